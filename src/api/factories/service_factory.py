@@ -74,15 +74,16 @@ class ServiceFactory:
                 rules=rules, text_processor=self.text_processor
             )
 
+            # Sử dụng global embedding service
+            embedding_service = get_embedding_service()
+
             # Initialize vector store and embeddings
             vector_store = QdrantVectorStore(
                 url=os.getenv("QDRANT_URL", "http://localhost:6333"),
                 api_key=os.getenv("QDRANT_API_KEY"),
+                embedding_service=embedding_service,
             )
 
-            # Sử dụng global embedding service
-            embedding_service = get_embedding_service()
-
             # Create hybrid intent service
             hybrid_config = HybridConfig(
                 rule_high_confidence_threshold=0.7,
@@ -137,7 +137,10 @@ class HybridIntentDetectionService:
             return self._create_fallback_result(0.1, DetectionMethod.FALLBACK)
 
     async def detect_batch_intents(
-        self, contexts: List[DetectionContext], max_concurrent: int = 10
+        self,
+        contexts: List[DetectionContext],
+        max_concurrent: int = 10,
+        semaphore: Optional[asyncio.Semaphore] = None,
     ) -> List[IntentResult]:
         """
         Process multiple queries concurrently with controlled parallelism
@@ -145,6 +148,8 @@ class HybridIntentDetectionService:
         Args:
             contexts: List of detection contexts to process
             max_concurrent: Maximum number of concurrent operations
+            semaphore: Optional per-query limiter shared with other batches;
+                replaces the max_concurrent limit when given
 
         Returns:
             List of IntentResult in the same order as input contexts
@@ -153,7 +158,8 @@ class HybridIntentDetectionService:
             return []
 
         # Process in batches to avoid overwhelming the system
-        semaphore = asyncio.Semaphore(max_concurrent)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max_concurrent)
 
         async def process_single_context(context: DetectionContext) -> IntentResult:
             async with semaphore:
@@ -175,7 +181,10 @@ class HybridIntentDetectionService:
         return results
 
     async def detect_batch_queries(
-        self, queries: List[str], max_concurrent: int = 10
+        self,
+        queries: List[str],
+        max_concurrent: int = 10,
+        semaphore: Optional[asyncio.Semaphore] = None,
     ) -> List[IntentResult]:
         """
         Convenience method to process multiple query strings
@@ -183,6 +192,7 @@ class HybridIntentDetectionService:
         Args:
             queries: List of query strings to process
             max_concurrent: Maximum number of concurrent operations
+            semaphore: Optional per-query limiter shared with other batches
 
         Returns:
             List of IntentResult in the same order as input queries
@@ -193,7 +203,7 @@ class HybridIntentDetectionService:
             if query and query.strip()
         ]
 
-        return await self.detect_batch_intents(contexts, max_concurrent)
+        return await self.detect_batch_intents(contexts, max_concurrent, semaphore)
 
     async def _vector_search(self, query: str) -> Optional[IntentResult]:
         """Optimized vector search for intent detection"""
@@ -201,20 +211,14 @@ class HybridIntentDetectionService:
             return None
 
         try:
-            # Generate query embedding with timeout
-            if not self.embedding_service:
-                return None
-            query_embedding = self.embedding_service.get_embedding(query)
-            if not query_embedding:
-                return None
-
-            # Search in vector store with optimized parameters
+            # Embed and search in vector store (repeated queries hit its cache)
             if not self.vector_store:
                 return None
-            candidates = await self.vector_store.search(
-                query_vector=query_embedding,
+            candidates = await self.vector_store.search_by_text(
+                query,
                 top_k=self.config.vector_top_k,
                 score_threshold=self.config.vector_confidence_threshold * 0.8,
+                embedding_service=self.embedding_service,
             )
 
             if not candidates:
@@ -228,13 +232,18 @@ class HybridIntentDetectionService:
             if best_candidate.score >= 0.9:
                 adjusted_confidence = min(0.95, adjusted_confidence * 1.1)
 
+            # Cờ from_cache của store chỉ giữ ở top-level metadata của kết quả
+            candidate_metadata = dict(best_candidate.metadata)
+            from_cache = candidate_metadata.pop("from_cache", False)
+
             return IntentResult(
                 id=best_candidate.intent_id,
                 confidence=adjusted_confidence,
                 method=DetectionMethod.VECTOR,
                 metadata={
                     "score": best_candidate.score,
-                    "metadata": best_candidate.metadata,
+                    "metadata": candidate_metadata,
+                    "from_cache": from_cache,
                 },
             )
 
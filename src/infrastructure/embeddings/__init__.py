@@ -3,9 +3,13 @@ Global embedding service for FPT University Agent
 """
 
 import os
+from typing import List, Optional
 
 from agno.embedder.openai import OpenAIEmbedder
 
+# OpenAI accepts up to 2048 inputs per embeddings request
+EMBEDDING_BATCH_SIZE = 2048
+
 # Global embedding service instance
 _embedding_service = None
 
@@ -31,6 +35,30 @@ def get_embedding_service() -> OpenAIEmbedder:
     return _embedding_service
 
 
+def get_embeddings_batch(
+    texts: List[str],
+    embedder: Optional[OpenAIEmbedder] = None,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+) -> List[List[float]]:
+    """
+    Embed many texts with one API request per batch_size inputs
+
+    Returns:
+        Embeddings in the same order as texts
+    """
+    embedder = embedder or get_embedding_service()
+    vectors: List[List[float]] = []
+
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start : start + batch_size]
+        # OpenAIEmbedder.response forwards input as-is; the API takes a list
+        response = embedder.response(batch)  # type: ignore[arg-type]
+        data = sorted(response.data, key=lambda item: item.index)
+        vectors.extend(item.embedding for item in data)
+
+    return vectors
+
+
 def reset_embedding_service():
     """Reset global embedding service (useful for testing)"""
     global _embedding_service
@@ -4,7 +4,8 @@ Optimized direct usage of Agno's MarkdownKnowledgeBase
 """
 
 import os
-from pathlib import Path
+from functools import lru_cache
+from typing import Optional
 
 from agno.knowledge.markdown import MarkdownKnowledgeBase
 from agno.reranker.cohere import CohereReranker
@@ -14,34 +15,32 @@ from agno.vectordb.search import SearchType
 from infrastructure.embeddings import get_embedding_service
 
 
-def create_fpt_knowledge_base(
-    collection_name: str = "fpt_university_knowledge",
-    knowledge_path: str = "docs/reference",
-) -> MarkdownKnowledgeBase:
-    """
-    Create optimized FPT University Knowledge Base using Agno directly
+@lru_cache(maxsize=4)
+def _get_reranker(
+    api_key: str, model: str = "rerank-multilingual-v3.0"
+) -> CohereReranker:
+    """Get shared Cohere reranker so its HTTP client is reused"""
+    return CohereReranker(model=model, api_key=api_key)
 
-    Returns:
-        MarkdownKnowledgeBase instance with optimized configuration
-    """
+
+@lru_cache(maxsize=8)
+def _get_vector_db(
+    url: str,
+    api_key: Optional[str],
+    collection_name: str,
+    cohere_api_key: Optional[str],
+) -> Qdrant:
+    """Get shared Qdrant vector db so its client connection pool is reused"""
     # Sử dụng global embedding service
     embedder = get_embedding_service()
 
     # Cấu hình reranker nếu có API key
-    reranker = None
-    cohere_api_key = os.getenv("COHERE_API_KEY")
-    if cohere_api_key:
-        reranker = CohereReranker(
-            model="rerank-multilingual-v3.0", api_key=cohere_api_key
-        )
+    reranker = _get_reranker(cohere_api_key) if cohere_api_key else None
 
     # Cấu hình Qdrant với timeout tối ưu
-    qdrant_url = os.getenv("QDRANT_URL", "http://localhost:6333")
-    qdrant_api_key = os.getenv("QDRANT_API_KEY")
-
-    vector_db = Qdrant(
-        url=qdrant_url,
-        api_key=qdrant_api_key,
+    return Qdrant(
+        url=url,
+        api_key=api_key,
         collection=collection_name,
         search_type=SearchType.vector,
         embedder=embedder,
@@ -50,6 +49,24 @@ def create_fpt_knowledge_base(
         check_compatibility=False,
     )
 
+
+def create_fpt_knowledge_base(
+    collection_name: str = "fpt_university_knowledge",
+    knowledge_path: str = "docs/reference",
+) -> MarkdownKnowledgeBase:
+    """
+    Create optimized FPT University Knowledge Base using Agno directly
+
+    Returns:
+        MarkdownKnowledgeBase instance with optimized configuration
+    """
+    vector_db = _get_vector_db(
+        os.getenv("QDRANT_URL", "http://localhost:6333"),
+        os.getenv("QDRANT_API_KEY"),
+        collection_name,
+        os.getenv("COHERE_API_KEY"),
+    )
+
     # Tạo knowledge base trực tiếp với cấu hình tối ưu
     knowledge_base = MarkdownKnowledgeBase(path=knowledge_path, vector_db=vector_db)
 
@@ -90,14 +107,14 @@ def get_knowledge_stats(knowledge_base: MarkdownKnowledgeBase) -> dict:
     try:
         # Use Agno's built-in exists() method
         exists = knowledge_base.exists()
-        knowledge_path = Path(str(knowledge_base.path))
+        knowledge_path = os.fspath(knowledge_base.path)
 
-        if not knowledge_path.exists():
+        if not os.path.isdir(knowledge_path):
             return {
                 "exists": False,
                 "document_count": 0,
                 "total_size": 0,
-                "path": str(knowledge_path),
+                "path": knowledge_path,
                 "type": "MarkdownKnowledgeBase",
             }
 
@@ -106,23 +123,26 @@ def get_knowledge_stats(knowledge_base: MarkdownKnowledgeBase) -> dict:
         documents = []
         total_size = 0
 
-        for file_path in knowledge_path.iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in supported_formats:
-                stat = file_path.stat()
-                documents.append(
-                    {
-                        "name": file_path.name,
-                        "size": stat.st_size,
-                        "modified": stat.st_mtime,
-                    }
-                )
-                total_size += stat.st_size
+        # os.scandir reuses stat info from the directory read
+        with os.scandir(knowledge_path) as entries:
+            for entry in entries:
+                extension = os.path.splitext(entry.name)[1].lower()
+                if extension in supported_formats and entry.is_file():
+                    stat = entry.stat()
+                    documents.append(
+                        {
+                            "name": entry.name,
+                            "size": stat.st_size,
+                            "modified": stat.st_mtime,
+                        }
+                    )
+                    total_size += stat.st_size
 
         return {
             "exists": exists,
             "document_count": len(documents),
             "total_size": total_size,
-            "path": str(knowledge_path),
+            "path": knowledge_path,
             "documents": documents,
             "type": "MarkdownKnowledgeBase",
             "supported_formats": supported_formats,
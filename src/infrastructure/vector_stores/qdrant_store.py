@@ -2,15 +2,36 @@
 Qdrant vector store implementation
 """
 
+import asyncio
+import hashlib
+import logging
 import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import replace
 from typing import Any, Dict, List, Optional
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, PointStruct, VectorParams
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
+from qdrant_client.models import (
+    Distance,
+    HnswConfigDiff,
+    PointStruct,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    ScoredPoint,
+    SearchParams,
+    VectorParams,
+)
 
 from core.domain.entities import SearchCandidate
 from shared.common_types import Metadata
 
+logger = logging.getLogger(__name__)
+
 
 class QdrantVectorStore:
     """
@@ -18,6 +39,14 @@ class QdrantVectorStore:
     Tận dụng tối đa các tính năng có sẵn của QdrantClient
     """
 
+    UPSERT_BATCH_SIZE = 256
+    UPSERT_MAX_CONCURRENT = 4
+
+    # int8 quantized vectors in RAM, full-precision originals rescored from disk
+    SEARCH_PARAMS = SearchParams(
+        quantization=QuantizationSearchParams(rescore=True, oversampling=2.0)
+    )
+
     def __init__(
         self,
         url: str = "http://localhost:6333",
@@ -25,25 +54,48 @@ class QdrantVectorStore:
         collection_name: str = "intent_examples_python_hybrid",
         vector_size: int = 1536,
         distance: Distance = Distance.COSINE,
+        prefer_grpc: bool = True,
+        grpc_port: int = 6334,
+        timeout: int = 30,
+        embedding_service: Optional[Any] = None,
+        cache_size: int = 1024,
+        cache_ttl: int = 300,
     ):
         self.collection_name = collection_name
         self.vector_size = vector_size
         self.distance = distance
+        self.embedding_service = embedding_service
 
-        try:
-            # Khởi tạo QdrantClient với URL trực tiếp
-            self.client = QdrantClient(
-                url=url, api_key=api_key or os.getenv("QDRANT_API_KEY")
-            )
+        # Cache kết quả search theo query text: key -> (expiry_time, candidates)
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._cache: OrderedDict[bytes, tuple[float, List[SearchCandidate]]] = (
+            OrderedDict()
+        )
+
+        # Khởi tạo QdrantClient qua gRPC (channel giữ kết nối, multiplex HTTP/2).
+        # Dựng client ngoài try: lỗi tham số là lỗi lập trình, không phải
+        # "Qdrant unavailable"
+        client_options: Dict[str, Any] = {
+            "url": url,
+            "api_key": api_key or os.getenv("QDRANT_API_KEY"),
+            "prefer_grpc": prefer_grpc,
+            "grpc_port": grpc_port,
+            "timeout": timeout,
+        }
+        self.client = QdrantClient(**client_options)
+        # Async client cho các thao tác batch
+        self.aclient = AsyncQdrantClient(**client_options)
 
+        try:
             # Tự động tạo collection nếu chưa tồn tại
             self._ensure_collection()
             self.available = True
 
-            print(f"✅ Qdrant connected: {url}")
+            logger.info("✅ Qdrant connected: %s", url)
 
         except Exception as e:
-            print(f"❌ Qdrant connection failed: {e}")
+            logger.exception("❌ Qdrant connection failed: %s", e)
             self.available = False
 
     def _ensure_collection(self):
@@ -52,12 +104,18 @@ class QdrantVectorStore:
             self.client.create_collection(
                 collection_name=self.collection_name,
                 vectors_config=VectorParams(
-                    size=self.vector_size, distance=self.distance
+                    size=self.vector_size, distance=self.distance, on_disk=True
+                ),
+                hnsw_config=HnswConfigDiff(m=32, ef_construct=256),
+                quantization_config=ScalarQuantization(
+                    scalar=ScalarQuantizationConfig(
+                        type=ScalarType.INT8, quantile=0.99, always_ram=True
+                    )
                 ),
             )
-            print(f"✅ Created collection: {self.collection_name}")
+            logger.info("✅ Created collection: %s", self.collection_name)
         else:
-            print(f"✅ Collection exists: {self.collection_name}")
+            logger.info("✅ Collection exists: %s", self.collection_name)
 
     async def search(
         self,
@@ -65,61 +123,241 @@ class QdrantVectorStore:
         top_k: int = 5,
         score_threshold: float = 0.6,
     ) -> List[SearchCandidate]:
-        """Search for similar vectors using QdrantClient's search method"""
+        """Search for similar vectors using QdrantClient's query_points method"""
         if not self.available:
             return []
 
         try:
-            # Sử dụng trực tiếp QdrantClient.search
-            search_result = self.client.search(
+            # Sử dụng QdrantClient.query_points (thay cho search đã deprecated)
+            search_result = self.client.query_points(
                 collection_name=self.collection_name,
-                query_vector=query_vector,
+                query=query_vector,
                 limit=top_k,
                 score_threshold=score_threshold,
+                search_params=self.SEARCH_PARAMS,
+            ).points
+
+            candidates = self._to_candidates(search_result)
+
+            logger.debug("🔍 Qdrant search: %d candidates found", len(candidates))
+            return candidates
+
+        except Exception as e:
+            logger.exception("❌ Qdrant search failed: %s", e)
+            return []
+
+    async def search_by_text(
+        self,
+        text: str,
+        top_k: int = 5,
+        score_threshold: float = 0.6,
+        embedding_service: Optional[Any] = None,
+    ) -> List[SearchCandidate]:
+        """Embed and search query text, serving repeated queries from a TTL LRU cache"""
+        if not self.available:
+            return []
+
+        # Ưu tiên embedder của caller, fallback về embedder của store
+        embedder = embedding_service or self.embedding_service
+        if embedder is None:
+            logger.warning("⚠️ search_by_text called without an embedding service")
+            return []
+
+        key = hashlib.sha256(f"{top_k}:{score_threshold}:{text}".encode()).digest()
+        current_time = time.time()
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            expiry_time, candidates = cached
+            if current_time <= expiry_time:
+                self._cache.move_to_end(key)
+                return [
+                    replace(c, metadata={**c.metadata, "from_cache": True})
+                    for c in candidates
+                ]
+            del self._cache[key]
+
+        query_vector = embedder.get_embedding(text)
+        if not query_vector:
+            return []
+
+        candidates = await self.search(
+            query_vector=query_vector, top_k=top_k, score_threshold=score_threshold
+        )
+
+        # Không cache kết quả rỗng (có thể do lỗi tạm thời từ Qdrant)
+        if candidates:
+            self._cache[key] = (current_time + self.cache_ttl, candidates)
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return candidates
+
+    def clear_cache(self) -> None:
+        """Clear the search result cache"""
+        self._cache.clear()
+
+    async def search_batch(
+        self,
+        query_vectors: List[List[float]],
+        top_k: int = 5,
+        score_threshold: float = 0.6,
+        deduplicate: bool = True,
+    ) -> List[List[SearchCandidate]]:
+        """Search for many vectors in a single round-trip using query_batch_points"""
+        if not self.available or not query_vectors:
+            return [[] for _ in query_vectors]
+
+        # Vector sai kích thước (vd. embedding rỗng) chỉ nhận [] cho riêng nó,
+        # không làm hỏng cả batch
+        vector_size = self.vector_size
+        valid_indices = [
+            i for i, vector in enumerate(query_vectors) if len(vector) == vector_size
+        ]
+        if len(valid_indices) < len(query_vectors):
+            logger.warning(
+                "⚠️ Skipping %d query vectors with size != %d",
+                len(query_vectors) - len(valid_indices),
+                self.vector_size,
             )
+        if not valid_indices:
+            return [[] for _ in query_vectors]
+        valid_vectors = [query_vectors[i] for i in valid_indices]
 
-            # Chuyển đổi kết quả thành SearchCandidate
-            candidates = [
-                SearchCandidate(
-                    text=point.payload.get("text", "") if point.payload else "",
-                    intent_id=point.payload.get("intent_id", "unknown")
-                    if point.payload
-                    else "unknown",
-                    score=point.score,
-                    metadata=point.payload or {},
-                    source="qdrant",
+        try:
+            # Gộp các vector trùng nhau (sau khi làm tròn) để chỉ gửi một lần
+            unique_vectors = valid_vectors
+            positions = list(range(len(valid_vectors)))
+            if deduplicate and len(valid_vectors) > 1:
+                unique_vectors, positions = self._deduplicate_vectors(valid_vectors)
+
+            requests = [
+                models.QueryRequest(
+                    query=vector,
+                    limit=top_k,
+                    score_threshold=score_threshold,
+                    params=self.SEARCH_PARAMS,
+                    with_payload=True,
                 )
-                for point in search_result
+                for vector in unique_vectors
             ]
 
-            print(f"🔍 Qdrant search: {len(candidates)} candidates found")
-            return candidates
+            batch_result = await self.aclient.query_batch_points(
+                collection_name=self.collection_name, requests=requests
+            )
+
+            unique_results = [
+                self._to_candidates(result.points) for result in batch_result
+            ]
+            results: List[List[SearchCandidate]] = [[] for _ in query_vectors]
+            for index, position in zip(valid_indices, positions):
+                results[index] = unique_results[position]
+
+            logger.debug(
+                "🔍 Qdrant batch search: %d queries processed (%d unique)",
+                len(valid_indices),
+                len(unique_results),
+            )
+            return results
 
         except Exception as e:
-            print(f"❌ Qdrant search failed: {e}")
-            return []
+            logger.exception("❌ Qdrant batch search failed: %s", e)
+            return [[] for _ in query_vectors]
+
+    @staticmethod
+    def _deduplicate_vectors(
+        query_vectors: List[List[float]],
+    ) -> tuple[List[List[float]], List[int]]:
+        """
+        Drop duplicate vectors, keyed on their values rounded to 4 decimals
+
+        Returns:
+            Unique vectors and, for each input, the index of its unique vector
+        """
+        rows = np.round(np.asarray(query_vectors, dtype=np.float32), 4)
+
+        first_index: Dict[bytes, int] = {}
+        unique_vectors: List[List[float]] = []
+        positions: List[int] = []
+        for vector, row in zip(query_vectors, rows):
+            key = row.tobytes()
+            position = first_index.get(key)
+            if position is None:
+                position = first_index[key] = len(unique_vectors)
+                unique_vectors.append(vector)
+            positions.append(position)
+
+        return unique_vectors, positions
+
+    def _to_candidates(self, points: List[ScoredPoint]) -> List[SearchCandidate]:
+        """Chuyển đổi kết quả thành SearchCandidate"""
+        candidate_cls = SearchCandidate
+        candidates = []
+        for point in points:
+            payload = point.payload or {}
+            candidates.append(
+                candidate_cls(
+                    text=payload.get("text", ""),
+                    intent_id=payload.get("intent_id", "unknown"),
+                    score=point.score,
+                    metadata=payload,
+                    source="qdrant",
+                )
+            )
+        return candidates
 
     async def add_documents(
         self, texts: List[str], vectors: List[List[float]], metadata: List[Metadata]
     ) -> None:
-        """Add documents using QdrantClient's upsert method"""
+        """Add documents using chunked, concurrent AsyncQdrantClient upserts"""
         if not self.available:
             return
 
         try:
-            # Tạo points với ID tự động
+            # ID xác định từ nội dung để upsert lại cùng dữ liệu không tạo bản sao
             points = [
-                PointStruct(id=i, vector=vector, payload={"text": text, **meta})
-                for i, (text, vector, meta) in enumerate(zip(texts, vectors, metadata))
+                PointStruct(
+                    id=self._point_id(text, meta),
+                    vector=vector,
+                    payload={"text": text, **meta},
+                )
+                for text, vector, meta in zip(texts, vectors, metadata)
             ]
 
-            # Sử dụng trực tiếp QdrantClient.upsert
-            self.client.upsert(collection_name=self.collection_name, points=points)
+            # Chia nhỏ và upsert song song qua connection pool;
+            # chỉ chunk cuối chờ server flush (wait=True)
+            batch_size = self.UPSERT_BATCH_SIZE
+            chunks = [
+                points[i : i + batch_size] for i in range(0, len(points), batch_size)
+            ]
+            if chunks:
+                # Giới hạn số upsert đồng thời để không dồn hết lên server cùng lúc
+                semaphore = asyncio.Semaphore(self.UPSERT_MAX_CONCURRENT)
 
-            print(f"✅ Added {len(points)} documents to Qdrant")
+                async def upsert_chunk(chunk: List[PointStruct]) -> None:
+                    async with semaphore:
+                        await self.aclient.upsert(
+                            collection_name=self.collection_name,
+                            points=chunk,
+                            wait=False,
+                        )
+
+                await asyncio.gather(*(upsert_chunk(chunk) for chunk in chunks[:-1]))
+                await self.aclient.upsert(
+                    collection_name=self.collection_name, points=chunks[-1], wait=True
+                )
+
+            logger.info("✅ Added %d documents to Qdrant", len(points))
 
         except Exception as e:
-            print(f"❌ Failed to add documents to Qdrant: {e}")
+            logger.exception("❌ Failed to add documents to Qdrant: %s", e)
+
+    @staticmethod
+    def _point_id(text: str, meta: Metadata) -> str:
+        """Derive a deterministic UUID5 point ID from the document content"""
+        name = f"{meta.get('intent_id', '')}:{text}"
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, name))
 
     async def get_collection_info(self) -> Dict[str, Any]:
         """Get collection information using QdrantClient's get_collection"""
@@ -136,7 +374,7 @@ class QdrantVectorStore:
                 "status": info.status,
             }
         except Exception as e:
-            print(f"❌ Failed to get collection info: {e}")
+            logger.exception("❌ Failed to get collection info: %s", e)
             return {"available": False, "error": str(e)}
 
     def collection_exists(self) -> bool:
@@ -150,8 +388,8 @@ class QdrantVectorStore:
 
         try:
             self.client.delete_collection(self.collection_name)
-            print(f"✅ Deleted collection: {self.collection_name}")
+            logger.info("✅ Deleted collection: %s", self.collection_name)
             return True
         except Exception as e:
-            print(f"❌ Failed to delete collection: {e}")
+            logger.exception("❌ Failed to delete collection: %s", e)
             return False
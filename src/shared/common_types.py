@@ -2,10 +2,22 @@
 Common type definitions for the intent detection system
 """
 
+import sys
 from dataclasses import dataclass
 from enum import Enum
 from typing import Any, Dict, Generic, List, Optional, TypeVar, Union
 
+if sys.version_info >= (3, 11):
+    from enum import StrEnum
+else:
+
+    class StrEnum(str, Enum):
+        """Backport of enum.StrEnum for Python 3.10"""
+
+        def __str__(self) -> str:
+            return str(self.value)
+
+
 # Basic type aliases
 QueryText = str
 IntentId = str
@@ -18,7 +30,7 @@ CacheKey = str
 T = TypeVar("T")
 
 
-class DetectionMethod(Enum):
+class DetectionMethod(StrEnum):
     """Methods used for intent detection"""
 
     RULE = "rule"
@@ -28,7 +40,7 @@ class DetectionMethod(Enum):
     FALLBACK = "fallback"
 
 
-class ConfidenceLevel(Enum):
+class ConfidenceLevel(StrEnum):
     """Confidence level categories"""
 
     VERY_HIGH = "very_high"  # >= 0.9
@@ -38,7 +50,7 @@ class ConfidenceLevel(Enum):
     VERY_LOW = "very_low"  # < 0.3
 
 
-class IntentCategory(Enum):
+class IntentCategory(StrEnum):
     """Categories of intents for FPT University"""
 
     TUITION_INQUIRY = "tuition_inquiry"
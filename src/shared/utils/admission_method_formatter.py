@@ -3,6 +3,8 @@
 Formatter for admission method data
 """
 
+from functools import lru_cache
+from io import StringIO
 from typing import Any, Dict, List, Optional
 
 
@@ -22,20 +24,21 @@ class AdmissionMethodFormatter:
         year = filters.get("year") if filters else None
         title = f"📝 **Các phương thức xét tuyển năm {year}**\n" if year else "📝 **Các phương thức xét tuyển**\n"
         
-        lines = [title]
+        buf = StringIO()
+        w = buf.write
+        w(title)
         for idx, m in enumerate(methods):
-            lines.append(
-                f"{idx + 1}. **{m.get('name', 'N/A')}** (`{m.get('method_code', 'N/A')}`)"
-            )
-        
-        lines.append("\n👉 Để xem chi tiết yêu cầu của từng phương thức, bạn vui lòng hỏi cụ thể hơn nhé.")
-        
+            g = m.get
+            w(f"\n{idx + 1}. **{g('name', 'N/A')}** (`{g('method_code', 'N/A')}`)")
+
+        w("\n\n👉 Để xem chi tiết yêu cầu của từng phương thức, bạn vui lòng hỏi cụ thể hơn nhé.")
+
         if meta.get("has_next"):
-            lines.append(
-                "💡 Gợi ý: Vẫn còn các phương thức khác, hãy thử tìm kiếm với bộ lọc chi tiết hơn."
+            w(
+                "\n💡 Gợi ý: Vẫn còn các phương thức khác, hãy thử tìm kiếm với bộ lọc chi tiết hơn."
             )
 
-        return "\n".join(lines)
+        return buf.getvalue()
 
     def format_admission_method_details(self, method: Dict[str, Any]) -> str:
         """Formats a single admission method's details into a string"""
@@ -55,7 +58,9 @@ class AdmissionMethodFormatter:
 
         return "\n".join(lines)
 
-    def _format_multiline(self, text: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _format_multiline(text: str) -> str:
         """Helper to format multiline text with indentation"""
         if not text:
             return "  - Chưa có thông tin"
@@ -3,6 +3,8 @@
 Formatter for scholarship data
 """
 
+from functools import lru_cache
+from io import StringIO
 from typing import Any, Dict, List, Optional
 
 
@@ -22,21 +24,21 @@ class ScholarshipFormatter:
         year = filters.get("year") if filters else None
         title = f"📚 **Danh sách học bổng năm {year}**\n\n" if year else "📚 **Danh sách học bổng**\n\n"
 
-        lines = [title]
+        buf = StringIO()
+        w = buf.write
+        w(title)
         for idx, s in enumerate(scholarships):
-            lines.append(
-                f"{idx + 1}. **{s.get('name', 'N/A')}** (`{s.get('code', 'N/A')}`)"
-            )
-            lines.append(f"   - **Giá trị:** {self._format_percentage(s.get('percentage'))}")
-            lines.append(f"   - **Loại:** {s.get('type', 'N/A').replace('_', ' ').title()}")
-            lines.append("")
+            g = s.get
+            w(f"\n{idx + 1}. **{g('name', 'N/A')}** (`{g('code', 'N/A')}`)")
+            w(f"\n   - **Giá trị:** {self._format_percentage(g('percentage'))}")
+            w(f"\n   - **Loại:** {g('type', 'N/A').replace('_', ' ').title()}\n")
 
         if meta.get("has_next"):
-            lines.append(
-                "💡 Gợi ý: Còn nhiều học bổng khác, hãy thử tìm kiếm với các bộ lọc chi tiết hơn hoặc xem trang tiếp theo."
+            w(
+                "\n💡 Gợi ý: Còn nhiều học bổng khác, hãy thử tìm kiếm với các bộ lọc chi tiết hơn hoặc xem trang tiếp theo."
             )
 
-        return "\n".join(lines)
+        return buf.getvalue()
 
     def format_scholarship_details(self, scholarship: Dict[str, Any]) -> str:
         """Formats a single scholarship's details into a string"""
@@ -65,7 +67,9 @@ class ScholarshipFormatter:
             return "Toàn phần"
         return f"{percentage}% học phí"
 
-    def _format_multiline(self, text: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _format_multiline(text: str) -> str:
         """Helper to format multiline text with indentation"""
         if not text:
             return "  - Chưa có thông tin"
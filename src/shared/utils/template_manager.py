@@ -4,12 +4,25 @@ Clean and simple implementation
 """
 
 import json
+import mmap
+from bisect import bisect_right
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+try:
+    import orjson
 
-@dataclass
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Confidence thresholds and the emoji for each band (below first .. above last)
+CONFIDENCE_THRESHOLDS = (0.3, 0.5, 0.7, 0.9)
+CONFIDENCE_EMOJIS = ("⚫", "🔴", "🟠", "🟡", "🟢")
+
+
+@dataclass(slots=True)
 class TemplateContext:
     """Context data for template rendering"""
 
@@ -22,7 +35,7 @@ class TemplateContext:
     action_suggestions: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TemplateConfig:
     """Template configuration"""
 
@@ -31,7 +44,7 @@ class TemplateConfig:
     fallback_language: str = "en"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ResultTemplateData:
     """Template data for result rendering"""
 
@@ -51,22 +64,107 @@ class ResultTemplateData:
 class TemplateManager:
     """Clean template manager for intent detection results"""
 
+    # (metadata key, label key, default label)
+    _METADATA_FIELDS = (
+        ("matched_keywords", "keywords", "🔑 Keywords"),
+        ("matched_patterns", "patterns", "📝 Patterns"),
+        ("confidence_adjusted", "confidence_adjusted", "🎯 Confidence adjusted"),
+        ("vector_similarity", "vector_similarity", "🔍 Vector similarity"),
+        ("from_cache", "from_cache", "💾 From cache"),
+        ("processing_time_ms", "processing_time", "⚡ Processing time"),
+    )
+
     def __init__(self, config: Optional[TemplateConfig] = None):
         self.config = config or TemplateConfig()
         self.templates_dir = Path(self.config.templates_dir)
         self._templates: Dict[str, Any] = {}
+        self._result_templates: Dict[str, ResultTemplateData] = {}
+        self._action_suggestions: Dict[str, Dict[str, List[str]]] = {}
+        self._error_templates: Dict[str, Dict[str, Dict[str, str]]] = {}
+        self._metadata_labels: Dict[str, Dict[str, str]] = {}
+        self._metadata_headers: Dict[str, str] = {}
+        self._next_steps: Dict[str, str] = {}
         self._load_templates()
 
     def _load_templates(self) -> None:
-        """Load templates from JSON file"""
+        """Load templates from JSON file and precompute per-language data"""
         templates_file = self.templates_dir / "templates.json"
 
         if templates_file.exists():
-            with open(templates_file, "r", encoding="utf-8") as f:
-                self._templates = json.load(f)
+            with open(templates_file, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if ORJSON_AVAILABLE:
+                        with memoryview(mm) as view:
+                            self._templates = orjson.loads(view)
+                    else:
+                        self._templates = json.loads(mm[:])
         else:
             print(f"⚠️ Templates file not found: {templates_file}")
 
+        self._build_caches()
+
+    def _build_caches(self) -> None:
+        """Resolve language fallbacks once so lookups are flat dict accesses"""
+        languages = self._get_languages()
+
+        self._result_templates = {
+            language: self._build_result_template_data(language)
+            for language in languages
+        }
+
+        suggestions_section = self._get_section_data("action_suggestions")
+        self._action_suggestions = {
+            intent_id: {
+                language: self._resolve_action_suggestions(intent_id, language)
+                for language in languages
+            }
+            for intent_id in suggestions_section
+        }
+
+        errors_section = self._get_section_data("error_templates")
+        self._error_templates = {
+            error_type: {
+                language: self._resolve_error_template(error_type, language)
+                for language in languages
+            }
+            for error_type in errors_section
+        }
+
+        self._metadata_labels = {}
+        for language in languages:
+            labels = self.get_metadata_labels(language)
+            self._metadata_labels[language] = {
+                label_key: labels.get(label_key, default)
+                for _, label_key, default in self._METADATA_FIELDS
+            }
+
+        self._metadata_headers = {
+            language: template.metadata_header
+            for language, template in self._result_templates.items()
+        }
+
+        # Next steps never vary per request
+        self._next_steps = {
+            language: self._render_next_steps(template)
+            for language, template in self._result_templates.items()
+        }
+
+    def _get_languages(self) -> List[str]:
+        """Collect every language code used in the templates"""
+        languages = {self.config.default_language, self.config.fallback_language}
+        for section in ("result_template", "metadata_labels"):
+            languages.update(self._get_section_data(section))
+        for section in ("action_suggestions", "error_templates"):
+            for data in self._get_section_data(section).values():
+                languages.update(data)
+        return sorted(languages)
+
+    def _by_language(self, data: Dict[str, Any], language: str) -> Any:
+        """Look up precomputed per-language data with fallback"""
+        if language in data:
+            return data[language]
+        return data.get(self.config.fallback_language)
+
     def _get_section_data(self, section: str) -> Dict[str, Any]:
         """Get section data from templates"""
         return self._templates.get("intent_detection", {}).get(section, {})
@@ -76,7 +174,11 @@ class TemplateManager:
         return data.get(language, data.get(self.config.fallback_language, {}))
 
     def _get_result_template_data(self, language: str) -> ResultTemplateData:
-        """Get result template data with defaults"""
+        """Get precomputed result template data"""
+        return self._by_language(self._result_templates, language)
+
+    def _build_result_template_data(self, language: str) -> ResultTemplateData:
+        """Build result template data with defaults"""
         section_data = self._get_section_data("result_template")
         template_data = self._get_language_data(section_data, language)
 
@@ -98,6 +200,13 @@ class TemplateManager:
 
     def get_action_suggestions(self, intent_id: str, language: str = "vi") -> List[str]:
         """Get action suggestions for intent"""
+        intent_data = self._action_suggestions.get(intent_id)
+        if intent_data is None:
+            intent_data = self._action_suggestions.get("default", {})
+        return self._by_language(intent_data, language) or []
+
+    def _resolve_action_suggestions(self, intent_id: str, language: str) -> List[str]:
+        """Resolve action suggestions for intent from raw template data"""
         section_data = self._get_section_data("action_suggestions")
         intent_data = section_data.get(intent_id, {})
 
@@ -115,6 +224,13 @@ class TemplateManager:
         self, error_type: str, language: str = "vi"
     ) -> Dict[str, str]:
         """Get error template data"""
+        error_data = self._error_templates.get(error_type)
+        if error_data is None:
+            error_data = self._error_templates.get("general", {})
+        return self._by_language(error_data, language) or {}
+
+    def _resolve_error_template(self, error_type: str, language: str) -> Dict[str, str]:
+        """Resolve error template data from raw template data"""
         section_data = self._get_section_data("error_templates")
         error_data = section_data.get(error_type, {})
 
@@ -134,109 +250,78 @@ class TemplateManager:
         self, context: TemplateContext, language: str = "vi"
     ) -> str:
         """Render result template with clean formatting"""
-        template_data = self._get_result_template_data(language)
-
-        # Build result sections
-        sections = [
-            self._render_header(template_data),
-            self._render_basic_info(context, template_data),
-            self._render_metadata(context.metadata_info, template_data),
-            self._render_suggestions(context.action_suggestions, template_data),
-            self._render_next_steps(template_data),
-        ]
-
-        return "\n".join(filter(None, sections))
-
-    def _render_header(self, template: ResultTemplateData) -> str:
-        """Render template header"""
-        return f"{template.header}\n{template.separator}"
-
-    def _render_basic_info(
-        self, context: TemplateContext, template: ResultTemplateData
-    ) -> str:
-        """Render basic information section"""
+        t = self._get_result_template_data(language)
         confidence_emoji = self._get_confidence_emoji(context.confidence)
         method_emoji = self._get_method_emoji(context.method)
 
-        lines = [
-            f'{template.query_label}: "{context.query}"',
-            f"{confidence_emoji} {template.intent_label}: {context.intent_id}",
-            f"{template.confidence_label}: {context.confidence}",
-            f"{method_emoji} {template.method_label}: {context.method}",
-            f"{template.timestamp_label}: {context.timestamp}",
-        ]
-
-        return "\n".join(lines)
-
-    def _render_metadata(self, metadata_info: str, template: ResultTemplateData) -> str:
-        """Render metadata section"""
-        if not metadata_info:
-            return ""
-        return f"\n{template.metadata_header}\n{metadata_info}"
-
-    def _render_suggestions(
-        self, suggestions: List[str], template: ResultTemplateData
-    ) -> str:
-        """Render action suggestions section"""
-        if not suggestions:
-            return ""
-
-        items = "\n".join(f"• {suggestion}" for suggestion in suggestions)
-        return f"\n{template.action_suggestions_header}\n{items}"
+        metadata = (
+            f"\n\n{t.metadata_header}\n{context.metadata_info}"
+            if context.metadata_info
+            else ""
+        )
+        suggestions = (
+            f"\n\n{t.action_suggestions_header}\n"
+            + "\n".join(f"• {suggestion}" for suggestion in context.action_suggestions)
+            if context.action_suggestions
+            else ""
+        )
+        next_steps = self._by_language(self._next_steps, language)
+
+        return (
+            f"{t.header}\n{t.separator}\n"
+            f'{t.query_label}: "{context.query}"\n'
+            f"{confidence_emoji} {t.intent_label}: {context.intent_id}\n"
+            f"{t.confidence_label}: {context.confidence}\n"
+            f"{method_emoji} {t.method_label}: {context.method}\n"
+            f"{t.timestamp_label}: {context.timestamp}"
+            f"{metadata}{suggestions}{next_steps}"
+        )
 
-    def _render_next_steps(self, template: ResultTemplateData) -> str:
+    @staticmethod
+    def _render_next_steps(template: ResultTemplateData) -> str:
         """Render next steps section"""
         if not template.next_steps_items:
             return ""
 
         items = "\n".join(f"- {step}" for step in template.next_steps_items)
-        return f"\n{template.next_steps_header}\n{items}"
+        return f"\n\n{template.next_steps_header}\n{items}"
 
     def format_metadata(self, metadata: Dict[str, Any], language: str = "vi") -> str:
         """Format metadata with clean structure"""
         if not metadata:
             return ""
 
-        labels = self.get_metadata_labels(language)
-
-        # Define metadata formatters
-        formatters = {
-            "matched_keywords": lambda v: f"{labels.get('keywords', '🔑 Keywords')}: {', '.join(v[:5])}",
-            "matched_patterns": lambda v: f"{labels.get('patterns', '📝 Patterns')}: {v}",
-            "confidence_adjusted": lambda _: labels.get(
-                "confidence_adjusted", "🎯 Confidence adjusted"
-            ),
-            "vector_similarity": lambda v: f"{labels.get('vector_similarity', '🔍 Vector similarity')}: {v:.3f}",
-            "from_cache": lambda _: labels.get("from_cache", "💾 From cache"),
-            "processing_time_ms": lambda v: f"{labels.get('processing_time', '⚡ Processing time')}: {v:.1f}ms",
-        }
+        labels = self._by_language(self._metadata_labels, language)
 
         # Apply formatters and collect parts
-        parts = [
-            formatter(metadata[key])
-            for key, formatter in formatters.items()
-            if key in metadata and metadata[key]
-        ]
+        parts = []
+        for key, label_key, _ in self._METADATA_FIELDS:
+            value = metadata.get(key)
+            if value:
+                parts.append(self._format_metadata_item(key, value, labels[label_key]))
 
         if not parts:
             return ""
 
-        template_data = self._get_result_template_data(language)
-        return f"{template_data.metadata_header}\n" + "\n".join(
-            f"   {part}" for part in parts
-        )
+        header = self._by_language(self._metadata_headers, language)
+        return f"{header}\n" + "\n".join(f"   {part}" for part in parts)
+
+    @staticmethod
+    def _format_metadata_item(key: str, value: Any, label: str) -> str:
+        """Format a single metadata entry"""
+        if key == "matched_keywords":
+            return f"{label}: {', '.join(value[:5])}"
+        if key == "vector_similarity":
+            return f"{label}: {value:.3f}"
+        if key == "processing_time_ms":
+            return f"{label}: {value:.1f}ms"
+        if key == "matched_patterns":
+            return f"{label}: {value}"
+        return label
 
     def _get_confidence_emoji(self, confidence: float) -> str:
         """Get confidence emoji based on score"""
-        if confidence >= 0.9:
-            return "🟢"
-        if confidence >= 0.7:
-            return "🟡"
-        if confidence >= 0.5:
-            return "🟠"
-        if confidence >= 0.3:
-            return "🔴"
-        return "⚫"
+        return CONFIDENCE_EMOJIS[bisect_right(CONFIDENCE_THRESHOLDS, confidence)]
 
     def _get_method_emoji(self, method: str) -> str:
         """Get method emoji"""
@@ -3,9 +3,12 @@ Vietnamese text processing utilities optimized for FPT University domain
 """
 
 import re
+import sys
 import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
 from functools import lru_cache
-from typing import Dict, FrozenSet, List, Pattern
+from typing import Dict, FrozenSet, List, Match, Optional, Pattern, Tuple
 
 try:
     UNIDECODE_AVAILABLE = True
@@ -13,145 +16,193 @@ except ImportError:
     UNIDECODE_AVAILABLE = False
 
 
+class _SpecialCharTable(dict):
+    """
+    str.translate table mapping special characters to spaces, filled lazily
+
+    Keeps word characters, whitespace and the Latin/Vietnamese ranges
+    U+00C0-U+024F and U+1E00-U+1EFF; everything else becomes a space.
+    """
+
+    def __missing__(self, codepoint: int) -> int:
+        char = chr(codepoint)
+        if (
+            char.isalnum()
+            or char == "_"
+            or char.isspace()
+            or 0x00C0 <= codepoint <= 0x024F
+            or 0x1E00 <= codepoint <= 0x1EFF
+        ):
+            self[codepoint] = codepoint
+        else:
+            self[codepoint] = 0x20
+        return self[codepoint]
+
+
+SPECIAL_CHAR_TABLE = _SpecialCharTable()
+
+
+@dataclass(frozen=True)
+class TextAnalysis:
+    """Per-text analysis shared by the public text processing helpers"""
+
+    normalized: str
+    keywords: Tuple[str, ...]
+    academic_context: Dict[str, List[str]]
+    language: str
+    is_irrelevant: bool
+    word_count: int
+
+
 class VietnameseTextProcessor:
     """
     Optimized Vietnamese text processing for FPT University domain
     """
 
+    NORMALIZE_CACHE_SIZE = 1024
+    # Eviction compares this many least recently used entries
+    NORMALIZE_EVICTION_SAMPLE = 8
+
     def __init__(self):
-        # Domain-specific stop words for FPT University context
+        # Domain-specific stop words for FPT University context (interned)
         self.stop_words: FrozenSet[str] = frozenset(
-            {
-                # Vietnamese stop words
-                "và",
-                "của",
-                "có",
-                "là",
-                "được",
-                "một",
-                "này",
-                "đó",
-                "cho",
-                "với",
-                "từ",
-                "tại",
-                "về",
-                "như",
-                "khi",
-                "nếu",
-                "để",
-                "sẽ",
-                "đã",
-                "đang",
-                "các",
-                "những",
-                "nhiều",
-                "ít",
-                "rất",
-                "quá",
-                "cũng",
-                "chỉ",
-                "còn",
-                "thì",
-                "mà",
-                "nên",
-                "vì",
-                "do",
-                "bởi",
-                "tại",
-                "ở",
-                "trong",
-                "ngoài",
-                "trên",
-                "dưới",
-                "trước",
-                "sau",
-                "giữa",
-                "bên",
-                "cạnh",
-                "gần",
-                "xa",
-                # English stop words
-                "the",
-                "a",
-                "an",
-                "and",
-                "or",
-                "but",
-                "in",
-                "on",
-                "at",
-                "to",
-                "for",
-                "of",
-                "with",
-                "by",
-                "is",
-                "are",
-                "was",
-                "were",
-                "be",
-                "been",
-                "have",
-                "has",
-                "had",
-                "do",
-                "does",
-                "did",
-                "will",
-                "would",
-                "could",
-                "should",
-                "can",
-                "may",
-                "might",
-                "must",
-                "shall",
-                "this",
-                "that",
-                "these",
-                "those",
-                "what",
-                "when",
-                "where",
-                "why",
-                "how",
-                "which",
-                "who",
-                "whom",
-                "whose",
-            }
+            map(
+                sys.intern,
+                {
+                    # Vietnamese stop words
+                    "và",
+                    "của",
+                    "có",
+                    "là",
+                    "được",
+                    "một",
+                    "này",
+                    "đó",
+                    "cho",
+                    "với",
+                    "từ",
+                    "tại",
+                    "về",
+                    "như",
+                    "khi",
+                    "nếu",
+                    "để",
+                    "sẽ",
+                    "đã",
+                    "đang",
+                    "các",
+                    "những",
+                    "nhiều",
+                    "ít",
+                    "rất",
+                    "quá",
+                    "cũng",
+                    "chỉ",
+                    "còn",
+                    "thì",
+                    "mà",
+                    "nên",
+                    "vì",
+                    "do",
+                    "bởi",
+                    "tại",
+                    "ở",
+                    "trong",
+                    "ngoài",
+                    "trên",
+                    "dưới",
+                    "trước",
+                    "sau",
+                    "giữa",
+                    "bên",
+                    "cạnh",
+                    "gần",
+                    "xa",
+                    # English stop words
+                    "the",
+                    "a",
+                    "an",
+                    "and",
+                    "or",
+                    "but",
+                    "in",
+                    "on",
+                    "at",
+                    "to",
+                    "for",
+                    "of",
+                    "with",
+                    "by",
+                    "is",
+                    "are",
+                    "was",
+                    "were",
+                    "be",
+                    "been",
+                    "have",
+                    "has",
+                    "had",
+                    "do",
+                    "does",
+                    "did",
+                    "will",
+                    "would",
+                    "could",
+                    "should",
+                    "can",
+                    "may",
+                    "might",
+                    "must",
+                    "shall",
+                    "this",
+                    "that",
+                    "these",
+                    "those",
+                    "what",
+                    "when",
+                    "where",
+                    "why",
+                    "how",
+                    "which",
+                    "who",
+                    "whom",
+                    "whose",
+                },
+            )
         )
 
         # FPT University specific stop words (keep these for context)
         self.domain_keywords: FrozenSet[str] = frozenset(
-            {
-                "fpt",
-                "university",
-                "đại học",
-                "trường",
-                "campus",
-                "sinh viên",
-                "student",
-                "giảng viên",
-                "lecturer",
-                "professor",
-                "khoa",
-                "faculty",
-                "ngành",
-                "major",
-                "chuyên ngành",
-                "specialization",
-                "môn học",
-                "course",
-                "subject",
-                "học kỳ",
-                "semester",
-                "năm học",
-                "academic year",
-                "tín chỉ",
-                "credit",
-            }
+            map(
+                sys.intern,
+                {
+                    "fpt",
+                    "university",
+                    "đại học",
+                    "trường",
+                    "campus",
+                    "sinh viên",
+                    "student",
+                    "giảng viên",
+                    "lecturer",
+                    "professor",
+                    "khoa",
+                    "faculty",
+                    "ngành",
+                    "major",
+                    "chuyên ngành",
+                    "specialization",
+                    "môn học",
+                    "course",
+                    "subject",
+                    "học kỳ",
+                    "semester",
+                    "năm học",
+                    "academic year",
+                    "tín chỉ",
+                    "credit",
+                },
+            )
         )
 
         # Enhanced irrelevant patterns for FPT University context
@@ -171,16 +222,14 @@ class VietnameseTextProcessor:
             r"xe cộ|car|motorcycle|traffic|giao thông",
         ]
 
-        # Pre-compile all patterns once
-        self.compiled_irrelevant: List[Pattern[str]] = [
-            re.compile(pattern, re.IGNORECASE | re.UNICODE)
-            for pattern in self.irrelevant_patterns
-        ]
+        # Fuse all patterns into one regex so the query is scanned once
+        self.irrelevant_pattern: Pattern[str] = re.compile(
+            "|".join(f"(?:{pattern})" for pattern in self.irrelevant_patterns),
+            re.IGNORECASE | re.UNICODE,
+        )
 
         # Pre-compile common regex patterns
-        self.whitespace_pattern = re.compile(r"\s+")
         self.word_pattern = re.compile(r"\b\w+\b")
-        self.special_char_pattern = re.compile(r"[^\w\s\u00C0-\u024F\u1E00-\u1EFF]")
 
         # Enhanced abbreviation mapping for FPT University domain
         self.abbreviations: Dict[str, str] = {
@@ -228,11 +277,15 @@ class VietnameseTextProcessor:
             "quy nhon": "quy nhơn",
         }
 
-        # Pre-compile abbreviation replacement patterns
-        self.abbreviation_patterns: Dict[str, Pattern[str]] = {
-            abbr: re.compile(r"\b" + re.escape(abbr) + r"\b", re.IGNORECASE)
-            for abbr in self.abbreviations.keys()
-        }
+        # Single alternation over all abbreviations so expansion is one pass.
+        # Longest first: multi-word entries ("fpt edu") win over prefixes ("fpt").
+        # Input is lowercased before expansion, so no IGNORECASE is needed.
+        sorted_abbreviations = sorted(self.abbreviations, key=len, reverse=True)
+        self.abbreviation_pattern: Pattern[str] = re.compile(
+            r"\b(?:"
+            + "|".join(re.escape(abbr) for abbr in sorted_abbreviations)
+            + r")\b"
+        )
 
         # Academic context patterns for better keyword extraction
         self.academic_patterns = [
@@ -248,12 +301,46 @@ class VietnameseTextProcessor:
             r"việc làm|career|job|employment",
         ]
 
-        self.compiled_academic: List[Pattern[str]] = [
-            re.compile(pattern, re.IGNORECASE | re.UNICODE)
-            for pattern in self.academic_patterns
+        # One capturing group per pattern; match.lastindex identifies the pattern
+        self.academic_pattern: Pattern[str] = re.compile(
+            "|".join(f"({pattern})" for pattern in self.academic_patterns),
+            re.IGNORECASE | re.UNICODE,
+        )
+
+        # Program and campus patterns are searched independently because
+        # short alternatives ("it", "se", "ai") overlap inside other terms;
+        # the first alternative is the canonical name
+        self.program_patterns: List[Tuple[Pattern[str], str]] = [
+            (re.compile(pattern, re.IGNORECASE), pattern.split("|")[0])
+            for pattern in (
+                r"công nghệ thông tin|information technology|it",
+                r"trí tuệ nhân tạo|artificial intelligence|ai",
+                r"kỹ thuật phần mềm|software engineering|se",
+                r"quản trị kinh doanh|business administration|mba",
+                r"thiết kế đồ họa|graphic design|gd",
+                r"digital marketing|marketing",
+                r"an toàn thông tin|cybersecurity|security",
+                r"khoa học dữ liệu|data science|ds",
+            )
+        ]
+        self.campus_patterns: List[Tuple[Pattern[str], str]] = [
+            (re.compile(pattern, re.IGNORECASE), pattern.split("|")[0])
+            for pattern in (
+                r"hà nội|hanoi",
+                r"thành phố hồ chí minh|hcm|ho chi minh",
+                r"đà nẵng|danang",
+                r"cần thơ|cantho",
+                r"hòa lạc|hoalac",
+                r"quy nhơn|quy nhon",
+            )
         ]
 
-    @lru_cache(maxsize=1024)
+        # Per-instance cache so normalize + regex scans run once per text
+        self._analyze = lru_cache(maxsize=512)(self._analyze_uncached)
+
+        # Cost-aware normalization cache: long texts are costlier to redo
+        self._normalize_cache: OrderedDict[str, str] = OrderedDict()
+
     def normalize_vietnamese(self, text: str) -> str:
         """
         Normalize Vietnamese text with enhanced FPT University context
@@ -261,21 +348,84 @@ class VietnameseTextProcessor:
         if not text:
             return ""
 
-        # Convert to lowercase
+        cache = self._normalize_cache
+        normalized = cache.get(text)
+        if normalized is not None:
+            cache.move_to_end(text)
+            return normalized
+
+        normalized = self._normalize_uncached(text)
+        self._store_normalized(text, normalized)
+        return normalized
+
+    def _store_normalized(self, text: str, normalized: str) -> None:
+        """Add an entry to the normalization cache, evicting if it is full"""
+        cache = self._normalize_cache
+        cache[text] = normalized
+        if len(cache) > self.NORMALIZE_CACHE_SIZE:
+            # Evict the cheapest (shortest) of the oldest entries, not just the LRU
+            oldest: List[str] = []
+            for key in cache:
+                oldest.append(key)
+                if len(oldest) >= self.NORMALIZE_EVICTION_SAMPLE:
+                    break
+            del cache[min(oldest, key=len)]
+
+    def _normalize_uncached(self, text: str) -> str:
+        """Normalization pipeline behind the normalize_vietnamese cache"""
+        # Convert to lowercase; ASCII text is already NFC so skip normalize,
+        # and the quick check avoids a copy for text that is already NFC
         text = text.lower()
+        if not text.isascii() and not unicodedata.is_normalized("NFC", text):
+            text = unicodedata.normalize("NFC", text)
 
-        # Normalize unicode
-        text = unicodedata.normalize("NFC", text)
+        return self._finish_normalize(text)
 
-        # Remove extra whitespace using pre-compiled pattern
-        text = self.whitespace_pattern.sub(" ", text).strip()
+    def _finish_normalize(self, text: str) -> str:
+        """Whitespace and abbreviation steps on lowercased NFC text"""
+        # Collapse whitespace only when there is a run or a non-space separator
+        # (isprintable() is False for tabs, newlines and Unicode spaces);
+        # split/join collapses and strips in C without the regex engine
+        if "  " in text or not text.isprintable():
+            text = " ".join(text.split())
+        else:
+            text = text.strip()
 
-        # Expand abbreviations using pre-compiled patterns
-        for abbr, full in self.abbreviations.items():
-            text = self.abbreviation_patterns[abbr].sub(full, text)
+        # Expand all abbreviations in a single scan
+        text = self.abbreviation_pattern.sub(self._expand_abbreviation, text)
 
         return text
 
+    def _expand_abbreviation(self, match: Match[str]) -> str:
+        """Replacement callback for abbreviation_pattern"""
+        return self.abbreviations[match.group(0)]
+
+    def _analyze_uncached(self, text: str) -> TextAnalysis:
+        """Normalize text once and derive keywords, context and relevance"""
+        if not text:
+            return TextAnalysis("", (), {}, "unknown", True, 0)
+
+        normalized = self.normalize_vietnamese(text)
+        academic_context = self._academic_context(normalized)
+
+        # Short texts are irrelevant; academic context marks a text relevant
+        if len(text.strip()) < 3:
+            is_irrelevant = True
+        elif any(academic_context.values()):
+            is_irrelevant = False
+        else:
+            is_irrelevant = self.irrelevant_pattern.search(text) is not None
+
+        return TextAnalysis(
+            normalized=normalized,
+            keywords=tuple(self._keywords(normalized, 2, 20)),
+            academic_context=academic_context,
+            language=self.detect_language(text),
+            is_irrelevant=is_irrelevant,
+            # Whitespace-separated words of the raw text, as reported before
+            word_count=len(text.split()),
+        )
+
     def extract_keywords(
         self, text: str, min_length: int = 2, max_keywords: int = 20
     ) -> List[str]:
@@ -285,45 +435,68 @@ class VietnameseTextProcessor:
         if not text:
             return []
 
-        # Normalize text
-        normalized = self.normalize_vietnamese(text)
+        analysis = self._analyze(text)
+        if min_length == 2 and max_keywords == 20:
+            return list(analysis.keywords)
 
-        # Use pre-compiled pattern for word extraction
-        words = self.word_pattern.findall(normalized)
+        return self._keywords(analysis.normalized, min_length, max_keywords)
 
+    def _keywords(
+        self, normalized: str, min_length: int, max_keywords: int
+    ) -> List[str]:
+        """Keyword extraction over already normalized text"""
         # Enhanced keyword filtering with domain awareness
-        keywords: List[str] = []
+        domain_hits: List[str] = []
+        other_hits: List[str] = []
         seen = set()
 
-        for word in words:
-            word_lower = word.lower()
+        # Iterate matches lazily so long texts stop at max_keywords
+        for match in self.word_pattern.finditer(normalized):
+            # Normalized text is already lowercase
+            word = match.group(0)
             if (
                 len(word) >= min_length
-                and word_lower not in self.stop_words
+                and word not in self.stop_words
                 and not word.isdigit()
-                and word_lower not in seen
+                and word not in seen
             ):
                 # Prioritize domain keywords
-                if word_lower in self.domain_keywords:
-                    keywords.insert(0, word_lower)  # Add to front
+                if word in self.domain_keywords:
+                    domain_hits.append(word)
                 else:
-                    keywords.append(word_lower)
+                    other_hits.append(word)
 
-                seen.add(word_lower)
+                seen.add(word)
 
                 # Early exit if we have enough keywords
-                if len(keywords) >= max_keywords:
+                if len(domain_hits) + len(other_hits) >= max_keywords:
                     break
 
-        return keywords
+        # Domain keywords go first, most recent first as with insert(0, ...)
+        return domain_hits[::-1] + other_hits
 
-    def extract_academic_context(self, text: str) -> Dict[str, List[str]]:
+    def extract_academic_context(
+        self, text: str, normalized: Optional[str] = None
+    ) -> Dict[str, List[str]]:
         """
         Extract academic context from text for better intent detection
         """
         if not text:
             return {}
 
+        # Callers that already normalized the text skip normalize + cache lookup
+        if normalized is not None:
+            return self._academic_context(normalized)
+
+        return self._copy_context(self._analyze(text).academic_context)
+
+    @staticmethod
+    def _copy_context(context: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """Copy cached context lists so callers cannot mutate the shared analysis"""
+        return {key: list(values) for key, values in context.items()}
+
+    def _academic_context(self, normalized: str) -> Dict[str, List[str]]:
+        """Academic context extraction over already normalized text"""
         context: Dict[str, List[str]] = {
             "academic_terms": [],
             "programs": [],
@@ -332,43 +505,23 @@ class VietnameseTextProcessor:
             "temporal_terms": [],
         }
 
-        normalized = self.normalize_vietnamese(text)
-
-        # Extract academic terms
-        for pattern in self.compiled_academic:
-            matches = pattern.findall(normalized)
-            if matches:
-                context["academic_terms"].extend(matches)
+        # Extract academic terms in one scan, grouped in pattern order
+        terms_by_pattern: List[List[str]] = [[] for _ in self.academic_patterns]
+        for match in self.academic_pattern.finditer(normalized):
+            if match.lastindex:
+                terms_by_pattern[match.lastindex - 1].append(match.group(0))
+        for terms in terms_by_pattern:
+            context["academic_terms"].extend(terms)
 
         # Extract program names
-        program_patterns: List[str] = [
-            r"công nghệ thông tin|information technology|it",
-            r"trí tuệ nhân tạo|artificial intelligence|ai",
-            r"kỹ thuật phần mềm|software engineering|se",
-            r"quản trị kinh doanh|business administration|mba",
-            r"thiết kế đồ họa|graphic design|gd",
-            r"digital marketing|marketing",
-            r"an toàn thông tin|cybersecurity|security",
-            r"khoa học dữ liệu|data science|ds",
-        ]
-
-        for pattern in program_patterns:
-            if re.search(pattern, normalized, re.IGNORECASE):  # type: ignore
-                context["programs"].append(pattern.split("|")[0])  # type: ignore
+        for pattern, name in self.program_patterns:
+            if pattern.search(normalized):
+                context["programs"].append(name)
 
         # Extract campus names
-        campus_patterns: List[str] = [
-            r"hà nội|hanoi",
-            r"thành phố hồ chí minh|hcm|ho chi minh",
-            r"đà nẵng|danang",
-            r"cần thơ|cantho",
-            r"hòa lạc|hoalac",
-            r"quy nhơn|quy nhon",
-        ]
-
-        for pattern in campus_patterns:
-            if re.search(pattern, normalized, re.IGNORECASE):  # type: ignore
-                context["campuses"].append(pattern.split("|")[0])  # type: ignore
+        for pattern, name in self.campus_patterns:
+            if pattern.search(normalized):
+                context["campuses"].append(name)
 
         return context
 
@@ -379,13 +532,19 @@ class VietnameseTextProcessor:
         if not text:
             return "unknown"
 
-        # Count Vietnamese characters more efficiently
-        vietnamese_chars = sum(1 for char in text if char.isalpha() and ord(char) > 127)
-        total_chars = sum(1 for char in text if char.isalpha())
+        # Count letters with C-level map instead of per-character generators
+        total_chars = sum(map(str.isalpha, text))
 
         if total_chars == 0:
             return "unknown"
 
+        # Non-ASCII letters = all letters - ASCII letters
+        if text.isascii():
+            vietnamese_chars = 0
+        else:
+            ascii_text = text.encode("ascii", "ignore").decode("ascii")
+            vietnamese_chars = total_chars - sum(map(str.isalpha, ascii_text))
+
         vietnamese_ratio = vietnamese_chars / total_chars
 
         return "vi" if vietnamese_ratio > 0.1 else "en"
@@ -397,21 +556,7 @@ class VietnameseTextProcessor:
         if not text:
             return True
 
-        # Early exit: check if text is too short to be relevant
-        if len(text.strip()) < 3:
-            return True
-
-        # Check for academic context first (if found, likely relevant)
-        academic_context = self.extract_academic_context(text)
-        if any(academic_context.values()):
-            return False
-
-        # Check against pre-compiled patterns with early exit
-        for pattern in self.compiled_irrelevant:
-            if pattern.search(text):
-                return True
-
-        return False
+        return self._analyze(text).is_irrelevant
 
     def clean_query(self, text: str) -> str:
         """
@@ -420,8 +565,8 @@ class VietnameseTextProcessor:
         if not text:
             return ""
 
-        # Use pre-compiled pattern for special character removal
-        text = self.special_char_pattern.sub(" ", text)
+        # Replace special characters with spaces in a single C-level pass
+        text = text.translate(SPECIAL_CHAR_TABLE)
 
         # Normalize using cached method
         text = self.normalize_vietnamese(text)
@@ -443,24 +588,43 @@ class VietnameseTextProcessor:
                 "is_irrelevant": True,
             }
 
-        # Process all statistics in one pass where possible
-        keywords = self.extract_keywords(text)
-        language = self.detect_language(text)
-        is_irrelevant = self.is_irrelevant_query(text)
-        academic_context = self.extract_academic_context(text)
+        # All statistics come from a single cached analysis
+        analysis = self._analyze(text)
 
         return {
             "length": len(text),
-            "word_count": len(text.split()),
-            "language": language,
-            "contains_vietnamese": language == "vi",
-            "keywords": keywords,
-            "academic_context": academic_context,
-            "is_irrelevant": is_irrelevant,
+            "word_count": analysis.word_count,
+            "language": analysis.language,
+            "contains_vietnamese": analysis.language == "vi",
+            "keywords": list(analysis.keywords),
+            "academic_context": self._copy_context(analysis.academic_context),
+            "is_irrelevant": analysis.is_irrelevant,
         }
 
+    def analyze_many(self, texts: List[str]) -> List[dict]:
+        """
+        Get text statistics for a batch of texts with one normalization pass
+        """
+        # Lowercase + NFC every uncached text in a single call; \x00 is left
+        # untouched by both and is not whitespace, so it splits back cleanly
+        pending = [
+            text
+            for text in dict.fromkeys(texts)
+            if text and "\x00" not in text and text not in self._normalize_cache
+        ]
+        if pending:
+            joined = "\x00".join(pending).lower()
+            if not joined.isascii() and not unicodedata.is_normalized("NFC", joined):
+                joined = unicodedata.normalize("NFC", joined)
+
+            for text, lowered in zip(pending, joined.split("\x00")):
+                self._store_normalized(text, self._finish_normalize(lowered))
+
+        return [self.get_text_statistics(text) for text in texts]
+
     def clear_cache(self):
         """
-        Clear the LRU cache for normalize_vietnamese method
+        Clear the normalization and text analysis caches
         """
-        self.normalize_vietnamese.cache_clear()
+        self._normalize_cache.clear()
+        self._analyze.cache_clear()
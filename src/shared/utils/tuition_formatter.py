@@ -3,79 +3,215 @@ Tuition Formatter for Agno Framework
 Response formatting for tuition data
 """
 
-from typing import Any, Dict, List, Optional
-
-from shared.utils.text_processing import VietnameseTextProcessor
-
-
-class TuitionFormatter:
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from shared.utils.university_formatters import BaseFormatter
+
+# Defaults mirror the previous per-field tuition.get(key, default) calls
+_TUITION_DEFAULTS: Dict[str, Any] = {
+    "id": "N/A",
+    "program_name": "N/A",
+    "program_name_en": "",
+    "program_code": "N/A",
+    "program_id": "N/A",
+    "campus_name": "N/A",
+    "campus_code": "N/A",
+    "campus_city": "N/A",
+    "campus_id": "N/A",
+    "campus_discount": 0,
+    "department_name": "N/A",
+    "department_name_en": "",
+    "department_code": "N/A",
+    "department_id": "N/A",
+    "year": "N/A",
+    "semester_group_1_3_fee": 0,
+    "semester_group_4_6_fee": 0,
+    "semester_group_7_9_fee": 0,
+    "total_program_fee": 0,
+    "min_semester_fee": 0,
+    "max_semester_fee": 0,
+}
+
+_TUITION_FEE_KEYS = (
+    "semester_group_1_3_fee",
+    "semester_group_4_6_fee",
+    "semester_group_7_9_fee",
+    "total_program_fee",
+    "min_semester_fee",
+    "max_semester_fee",
+)
+
+_CAMPUS_SUMMARY_DEFAULTS: Dict[str, Any] = {
+    "campus_name": "N/A",
+    "campus_code": "N/A",
+    "campus_city": "N/A",
+    "campus_id": "N/A",
+    "discount_percentage": 0,
+    "total_programs": 0,
+    "total_departments": 0,
+    "min_semester_fee": 0,
+    "max_semester_fee": 0,
+    "avg_semester_1_3_fee": 0,
+    "avg_semester_4_6_fee": 0,
+    "avg_semester_7_9_fee": 0,
+}
+
+_CAMPUS_SUMMARY_FEE_KEYS = (
+    "min_semester_fee",
+    "max_semester_fee",
+    "avg_semester_1_3_fee",
+    "avg_semester_4_6_fee",
+    "avg_semester_7_9_fee",
+)
+
+# Templates are filled with str.format_map in a single call per block;
+# fee fields arrive pre-formatted by _with_vnd
+_TUITION_RECORD_HEADER = (
+    "💰 **{program_name}** ({program_code})\n"
+    "   🏛️ Khoa: {department_name}\n"
+    "   🏫 Campus: {campus_name} ({campus_code}) - {campus_city}\n"
+    "   📅 Năm: {year}\n"
+)
+_TUITION_RECORD_FEES = (
+    "   💳 Học phí theo kỳ:\n"
+    "      📚 Kỳ 1-3: {semester_group_1_3_fee} VND\n"
+    "      📚 Kỳ 4-6: {semester_group_4_6_fee} VND\n"
+    "      📚 Kỳ 7-9: {semester_group_7_9_fee} VND\n"
+    "   💰 Tổng học phí: {total_program_fee} VND\n"
+    "   📊 Phạm vi: {min_semester_fee} - {max_semester_fee} VND/kỳ\n\n"
+)
+_TUITION_RECORD_TMPL = _TUITION_RECORD_HEADER + _TUITION_RECORD_FEES
+_TUITION_RECORD_DISCOUNT_TMPL = (
+    _TUITION_RECORD_HEADER
+    + "   🎯 Giảm giá: {campus_discount}%\n"
+    + _TUITION_RECORD_FEES
+)
+
+_TUITION_DETAILS_PROGRAM = (
+    "💰 **CHI TIẾT HỌC PHÍ FPT UNIVERSITY**\n\n"
+    "🎯 **THÔNG TIN CHƯƠNG TRÌNH**\n"
+    "   📚 Tên chương trình: {program_name}\n"
+)
+_TUITION_DETAILS_DEPARTMENT = (
+    "   🔖 Mã chương trình: {program_code}\n"
+    "   🆔 ID chương trình: {program_id}\n\n"
+    "🏛️ **THÔNG TIN KHOA**\n"
+    "   📚 Tên khoa: {department_name}\n"
+)
+_TUITION_DETAILS_CAMPUS = (
+    "   🔖 Mã khoa: {department_code}\n"
+    "   🆔 ID khoa: {department_id}\n\n"
+    "🏫 **THÔNG TIN CAMPUS**\n"
+    "   🏫 Tên campus: {campus_name}\n"
+    "   🔖 Mã campus: {campus_code}\n"
+    "   📍 Thành phố: {campus_city}\n"
+    "   🆔 ID campus: {campus_id}\n"
+)
+_TUITION_DETAILS_FEES = (
+    "\n"
+    "📅 **NĂM HỌC**: {year}\n"
+    "🆔 **ID học phí**: {id}\n\n"
+    "💳 **CHI TIẾT HỌC PHÍ**\n"
+    "   📚 Kỳ 1-3: {semester_group_1_3_fee} VND\n"
+    "   📚 Kỳ 4-6: {semester_group_4_6_fee} VND\n"
+    "   📚 Kỳ 7-9: {semester_group_7_9_fee} VND\n"
+    "   💰 Tổng học phí: {total_program_fee} VND\n"
+    "   📊 Phạm vi: {min_semester_fee} - {max_semester_fee} VND/kỳ\n"
+)
+
+_CAMPUS_SUMMARY_INFO = (
+    "🏫 **THÔNG TIN CAMPUS**\n"
+    "   🏫 Tên campus: {campus_name}\n"
+    "   🔖 Mã campus: {campus_code}\n"
+    "   📍 Thành phố: {campus_city}\n"
+    "   🆔 ID campus: {campus_id}\n"
+)
+_CAMPUS_SUMMARY_STATS = (
+    "\n"
+    "📊 **THỐNG KÊ TỔNG QUAN**\n"
+    "   🎓 Tổng số chương trình: {total_programs}\n"
+    "   🏛️ Tổng số khoa: {total_departments}\n"
+    "   💰 Phạm vi học phí: {min_semester_fee} - {max_semester_fee} VND/kỳ\n"
+    "\n"
+    "📈 **HỌC PHÍ TRUNG BÌNH**\n"
+    "   📚 Kỳ 1-3: {avg_semester_1_3_fee} VND\n"
+    "   📚 Kỳ 4-6: {avg_semester_4_6_fee} VND\n"
+    "   📚 Kỳ 7-9: {avg_semester_7_9_fee} VND\n\n"
+)
+_SUMMARY_PROGRAM_DEFAULTS: Dict[str, Any] = {
+    "program_name": "N/A",
+    "program_code": "N/A",
+    "department_name": "N/A",
+    "semester_1_3_fee": 0,
+    "semester_4_6_fee": 0,
+    "semester_7_9_fee": 0,
+}
+_SUMMARY_PROGRAM_TMPL = (
+    "   🎯 **{program_name}** ({program_code})\n"
+    "      🏛️ Khoa: {department_name}\n"
+    "      💰 Học phí: {semester_1_3_fee} - {semester_4_6_fee}"
+    " - {semester_7_9_fee} VND\n"
+)
+_SUMMARY_PROGRAM_FEE_KEYS = ("semester_1_3_fee", "semester_4_6_fee", "semester_7_9_fee")
+_ENGLISH_NAME_LINE = "   📝 English: {}\n"
+
+# (filter key, label) pairs shown in the empty tuition list message
+_FILTER_LABELS = (
+    ("program_code", "ngành"),
+    ("campus_code", "campus"),
+    ("department_code", "khoa"),
+    ("year", "năm"),
+)
+_TUITION_LIST_TITLE = "DANH SÁCH HỌC PHÍ FPT UNIVERSITY"
+_ERR_NO_TUITION = "❌ Không tìm thấy thông tin học phí."
+_ERR_NO_CAMPUS_SUMMARY = "❌ Không tìm thấy thông tin tổng hợp học phí campus."
+
+
+@lru_cache(maxsize=2048)
+def _format_vnd(amount: Any) -> str:
+    """Thousands-separated fee; the same amounts repeat across records"""
+    return format(amount, ",")
+
+
+def _with_vnd(
+    defaults: Dict[str, Any], source: Dict[str, Any], fee_keys: Tuple[str, ...]
+) -> Dict[str, Any]:
+    """Merge source over defaults and pre-format its fee fields"""
+    data = {**defaults, **source}
+    for key in fee_keys:
+        data[key] = _format_vnd(data[key])
+    return data
+
+
+def _render_tuition_record(tuition: Dict[str, Any]) -> str:
+    """Fill the tuition record template for one record"""
+    data = _with_vnd(_TUITION_DEFAULTS, tuition, _TUITION_FEE_KEYS)
+    if data["campus_discount"] > 0:
+        return _TUITION_RECORD_DISCOUNT_TMPL.format_map(data)
+    return _TUITION_RECORD_TMPL.format_map(data)
+
+
+class TuitionFormatter(BaseFormatter):
     """Formatter for tuition data"""
 
-    def __init__(self):
-        self.text_processor = VietnameseTextProcessor()
-
-    def _format_list_response(
-        self,
-        items: List[Dict[str, Any]],
-        meta: Dict[str, Any],
-        title: str,
-        format_item_func,
-        empty_message: str,
-    ) -> str:
-        """Helper method to format list responses consistently"""
-        if not items:
-            return f"💰 {empty_message}"
-
-        result = f"💰 **{title}**\n\n"
-
-        for item in items:
-            if isinstance(item, dict):
-                result += format_item_func(item)
-
-        # Add pagination info
-        total = meta.get("total", len(items))
-        has_next = meta.get("has_next", False)
-
-        result += f"\n📊 **Thống kê**: Hiển thị {len(items)}/{total} kết quả"
-        if has_next:
-            result += f" (có thêm {total - len(items)} kết quả khác)"
-
-        return result
+    LIST_EMOJI: str = "💰"
 
     def format_tuition_record(self, tuition: Dict[str, Any]) -> str:
         """Format single tuition record"""
-        program_name = tuition.get("program_name", "N/A")
-        program_code = tuition.get("program_code", "N/A")
-        campus_name = tuition.get("campus_name", "N/A")
-        campus_code = tuition.get("campus_code", "N/A")
-        campus_city = tuition.get("campus_city", "N/A")
-        department_name = tuition.get("department_name", "N/A")
-        year = tuition.get("year", "N/A")
-
-        semester_1_3 = tuition.get("semester_group_1_3_fee", 0)
-        semester_4_6 = tuition.get("semester_group_4_6_fee", 0)
-        semester_7_9 = tuition.get("semester_group_7_9_fee", 0)
-        total_fee = tuition.get("total_program_fee", 0)
-        min_semester = tuition.get("min_semester_fee", 0)
-        max_semester = tuition.get("max_semester_fee", 0)
-        campus_discount = tuition.get("campus_discount", 0)
-
-        result = f"💰 **{program_name}** ({program_code})\n"
-        result += f"   🏛️ Khoa: {department_name}\n"
-        result += f"   🏫 Campus: {campus_name} ({campus_code}) - {campus_city}\n"
-        result += f"   📅 Năm: {year}\n"
-
-        if campus_discount > 0:
-            result += f"   🎯 Giảm giá: {campus_discount}%\n"
-
-        result += "   💳 Học phí theo kỳ:\n"
-        result += f"      📚 Kỳ 1-3: {semester_1_3:,} VND\n"
-        result += f"      📚 Kỳ 4-6: {semester_4_6:,} VND\n"
-        result += f"      📚 Kỳ 7-9: {semester_7_9:,} VND\n"
-        result += f"   💰 Tổng học phí: {total_fee:,} VND\n"
-        result += f"   📊 Phạm vi: {min_semester:,} - {max_semester:,} VND/kỳ\n\n"
-
-        return result
+        return _render_tuition_record(tuition)
+
+    def format_tuition_records_bulk(self, tuition_records: List[Dict[str, Any]]) -> str:
+        """Format many tuition records into one string in a single join"""
+        return "".join(self._iter_tuition_records(tuition_records))
+
+    @staticmethod
+    def _iter_tuition_records(tuition_records: List[Dict[str, Any]]) -> Iterator[str]:
+        """Render each dict record, skipping malformed entries"""
+        return map(
+            _render_tuition_record,
+            [record for record in tuition_records if isinstance(record, dict)],
+        )
 
     def format_tuition_list(
         self,
@@ -84,160 +220,89 @@ class TuitionFormatter:
         filters: Optional[Dict[str, str]] = None,
     ) -> str:
         """Format tuition list"""
+        return "".join(self.iter_tuition_list(tuition_records, meta, filters))
+
+    def iter_tuition_list(
+        self,
+        tuition_records: List[Dict[str, Any]],
+        meta: Dict[str, Any],
+        filters: Optional[Dict[str, str]] = None,
+    ) -> Iterator[str]:
+        """Yield the tuition list response chunk by chunk for streaming"""
+        if not tuition_records:
+            yield self._empty_tuition_message(filters)
+            return
+
+        yield f"{self.LIST_EMOJI} **{_TUITION_LIST_TITLE}**\n\n"
+        yield from self._iter_tuition_records(tuition_records)
+        yield self._format_pagination(len(tuition_records), meta)
+
+    def _empty_tuition_message(self, filters: Optional[Dict[str, str]]) -> str:
+        """Empty-result message; filters only show up here"""
         filter_text = ""
         if filters:
-            filter_parts = []
-            if filters.get("program_code"):
-                filter_parts.append(f"ngành: {filters['program_code']}")
-            if filters.get("campus_code"):
-                filter_parts.append(f"campus: {filters['campus_code']}")
-            if filters.get("department_code"):
-                filter_parts.append(f"khoa: {filters['department_code']}")
-            if filters.get("year"):
-                filter_parts.append(f"năm: {filters['year']}")
-
+            filter_parts = [
+                f"{label}: {value}"
+                for key, label in _FILTER_LABELS
+                if (value := filters.get(key))
+            ]
             if filter_parts:
                 filter_text = f" ({', '.join(filter_parts)})"
 
-        empty_msg = f"Không tìm thấy thông tin học phí nào{filter_text}."
-
-        return self._format_list_response(
-            tuition_records,
-            meta,
-            "DANH SÁCH HỌC PHÍ FPT UNIVERSITY",
-            self.format_tuition_record,
-            empty_msg,
-        )
+        return f"{self.LIST_EMOJI} Không tìm thấy thông tin học phí nào{filter_text}."
 
     def format_tuition_details(self, tuition: Dict[str, Any]) -> str:
         """Format tuition details"""
         if not isinstance(tuition, dict):
-            return "❌ Không tìm thấy thông tin học phí."
-
-        program_name = tuition.get("program_name", "N/A")
-        program_name_en = tuition.get("program_name_en", "")
-        program_code = tuition.get("program_code", "N/A")
-        program_id = tuition.get("program_id", "N/A")
-
-        campus_name = tuition.get("campus_name", "N/A")
-        campus_code = tuition.get("campus_code", "N/A")
-        campus_city = tuition.get("campus_city", "N/A")
-        campus_id = tuition.get("campus_id", "N/A")
-        campus_discount = tuition.get("campus_discount", 0)
-
-        department_name = tuition.get("department_name", "N/A")
-        department_name_en = tuition.get("department_name_en", "")
-        department_code = tuition.get("department_code", "N/A")
-        department_id = tuition.get("department_id", "N/A")
-
-        year = tuition.get("year", "N/A")
-        tuition_id = tuition.get("id", "N/A")
-
-        semester_1_3 = tuition.get("semester_group_1_3_fee", 0)
-        semester_4_6 = tuition.get("semester_group_4_6_fee", 0)
-        semester_7_9 = tuition.get("semester_group_7_9_fee", 0)
-        total_fee = tuition.get("total_program_fee", 0)
-        min_semester = tuition.get("min_semester_fee", 0)
-        max_semester = tuition.get("max_semester_fee", 0)
-
-        result = "💰 **CHI TIẾT HỌC PHÍ FPT UNIVERSITY**\n\n"
-
-        result += "🎯 **THÔNG TIN CHƯƠNG TRÌNH**\n"
-        result += f"   📚 Tên chương trình: {program_name}\n"
-        if program_name_en:
-            result += f"   📝 English: {program_name_en}\n"
-        result += f"   🔖 Mã chương trình: {program_code}\n"
-        result += f"   🆔 ID chương trình: {program_id}\n\n"
-
-        result += "🏛️ **THÔNG TIN KHOA**\n"
-        result += f"   📚 Tên khoa: {department_name}\n"
-        if department_name_en:
-            result += f"   📝 English: {department_name_en}\n"
-        result += f"   🔖 Mã khoa: {department_code}\n"
-        result += f"   🆔 ID khoa: {department_id}\n\n"
-
-        result += "🏫 **THÔNG TIN CAMPUS**\n"
-        result += f"   🏫 Tên campus: {campus_name}\n"
-        result += f"   🔖 Mã campus: {campus_code}\n"
-        result += f"   📍 Thành phố: {campus_city}\n"
-        result += f"   🆔 ID campus: {campus_id}\n"
-        if campus_discount > 0:
-            result += f"   🎯 Giảm giá: {campus_discount}%\n"
-        result += "\n"
-
-        result += f"📅 **NĂM HỌC**: {year}\n"
-        result += f"🆔 **ID học phí**: {tuition_id}\n\n"
-
-        result += "💳 **CHI TIẾT HỌC PHÍ**\n"
-        result += f"   📚 Kỳ 1-3: {semester_1_3:,} VND\n"
-        result += f"   📚 Kỳ 4-6: {semester_4_6:,} VND\n"
-        result += f"   📚 Kỳ 7-9: {semester_7_9:,} VND\n"
-        result += f"   💰 Tổng học phí: {total_fee:,} VND\n"
-        result += f"   📊 Phạm vi: {min_semester:,} - {max_semester:,} VND/kỳ\n"
-
-        return result
+            return _ERR_NO_TUITION
+
+        data = _with_vnd(_TUITION_DEFAULTS, tuition, _TUITION_FEE_KEYS)
+
+        parts = [_TUITION_DETAILS_PROGRAM.format_map(data)]
+        if data["program_name_en"]:
+            parts.append(_ENGLISH_NAME_LINE.format(data["program_name_en"]))
+        parts.append(_TUITION_DETAILS_DEPARTMENT.format_map(data))
+        if data["department_name_en"]:
+            parts.append(_ENGLISH_NAME_LINE.format(data["department_name_en"]))
+        parts.append(_TUITION_DETAILS_CAMPUS.format_map(data))
+        if data["campus_discount"] > 0:
+            parts.append(f"   🎯 Giảm giá: {data['campus_discount']}%\n")
+        parts.append(_TUITION_DETAILS_FEES.format_map(data))
+
+        return "".join(parts)
 
     def format_campus_tuition_summary(
         self, campus_data: Dict[str, Any], year: int
     ) -> str:
         """Format campus tuition summary"""
         if not isinstance(campus_data, dict):
-            return "❌ Không tìm thấy thông tin tổng hợp học phí campus."
-
-        campus_name = campus_data.get("campus_name", "N/A")
-        campus_code = campus_data.get("campus_code", "N/A")
-        campus_city = campus_data.get("campus_city", "N/A")
-        campus_id = campus_data.get("campus_id", "N/A")
-        discount_percentage = campus_data.get("discount_percentage", 0)
-
-        total_programs = campus_data.get("total_programs", 0)
-        total_departments = campus_data.get("total_departments", 0)
-
-        min_semester_fee = campus_data.get("min_semester_fee", 0)
-        max_semester_fee = campus_data.get("max_semester_fee", 0)
-        avg_semester_1_3_fee = campus_data.get("avg_semester_1_3_fee", 0)
-        avg_semester_4_6_fee = campus_data.get("avg_semester_4_6_fee", 0)
-        avg_semester_7_9_fee = campus_data.get("avg_semester_7_9_fee", 0)
+            return _ERR_NO_CAMPUS_SUMMARY
 
+        data = _with_vnd(
+            _CAMPUS_SUMMARY_DEFAULTS, campus_data, _CAMPUS_SUMMARY_FEE_KEYS
+        )
         programs = campus_data.get("programs", [])
 
-        result = f"💰 **TỔNG HỢP HỌC PHÍ CAMPUS {year}**\n\n"
-
-        result += "🏫 **THÔNG TIN CAMPUS**\n"
-        result += f"   🏫 Tên campus: {campus_name}\n"
-        result += f"   🔖 Mã campus: {campus_code}\n"
-        result += f"   📍 Thành phố: {campus_city}\n"
-        result += f"   🆔 ID campus: {campus_id}\n"
-        if discount_percentage > 0:
-            result += f"   🎯 Giảm giá: {discount_percentage}%\n"
-        result += "\n"
-
-        result += "📊 **THỐNG KÊ TỔNG QUAN**\n"
-        result += f"   🎓 Tổng số chương trình: {total_programs}\n"
-        result += f"   🏛️ Tổng số khoa: {total_departments}\n"
-        result += f"   💰 Phạm vi học phí: {min_semester_fee:,} - {max_semester_fee:,} VND/kỳ\n"
-        result += "\n"
-
-        result += "📈 **HỌC PHÍ TRUNG BÌNH**\n"
-        result += f"   📚 Kỳ 1-3: {avg_semester_1_3_fee:,} VND\n"
-        result += f"   📚 Kỳ 4-6: {avg_semester_4_6_fee:,} VND\n"
-        result += f"   📚 Kỳ 7-9: {avg_semester_7_9_fee:,} VND\n\n"
+        parts = [
+            f"💰 **TỔNG HỢP HỌC PHÍ CAMPUS {year}**\n\n",
+            _CAMPUS_SUMMARY_INFO.format_map(data),
+        ]
+        if data["discount_percentage"] > 0:
+            parts.append(f"   🎯 Giảm giá: {data['discount_percentage']}%\n")
+        parts.append(_CAMPUS_SUMMARY_STATS.format_map(data))
 
         if programs:
-            result += "📚 **DANH SÁCH CHƯƠNG TRÌNH**\n"
-            for program in programs[:10]:  # Limit to first 10
-                program_name = program.get("program_name", "N/A")
-                program_code = program.get("program_code", "N/A")
-                department_name = program.get("department_name", "N/A")
-                semester_1_3 = program.get("semester_1_3_fee", 0)
-                semester_4_6 = program.get("semester_4_6_fee", 0)
-                semester_7_9 = program.get("semester_7_9_fee", 0)
-
-                result += f"   🎯 **{program_name}** ({program_code})\n"
-                result += f"      🏛️ Khoa: {department_name}\n"
-                result += f"      💰 Học phí: {semester_1_3:,} - {semester_4_6:,} - {semester_7_9:,} VND\n"
+            parts.append("📚 **DANH SÁCH CHƯƠNG TRÌNH**\n")
+            parts.extend(
+                _SUMMARY_PROGRAM_TMPL.format_map(
+                    _with_vnd(
+                        _SUMMARY_PROGRAM_DEFAULTS, program, _SUMMARY_PROGRAM_FEE_KEYS
+                    )
+                )
+                for program in programs[:10]  # Limit to first 10
+            )
 
             if len(programs) > 10:
-                result += f"   ... và {len(programs) - 10} chương trình khác\n"
+                parts.append(f"   ... và {len(programs) - 10} chương trình khác\n")
 
-        return result
+        return "".join(parts)
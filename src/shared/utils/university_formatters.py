@@ -3,44 +3,94 @@ University Formatters for Agno Framework
 Response formatting classes for university data
 """
 
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 from shared.utils.text_processing import VietnameseTextProcessor
 
+_TEXT_PROCESSOR = VietnameseTextProcessor()
+
+_ERR_NO_PROGRAM = "❌ Không tìm thấy thông tin chương trình học."
+_ERR_NO_CAMPUS = "❌ Không tìm thấy thông tin campus."
+
+# Optional campus lines as (key, template, clean with clean_query)
+_CAMPUS_CONTACT_FIELDS: Tuple[Tuple[str, str, bool], ...] = (
+    ("address", "   🏠 Địa chỉ: {}\n", True),
+    ("phone", "   📞 Điện thoại: {}\n", False),
+    ("email", "   📧 Email: {}\n", False),
+)
+_CONTACT_INFO_FIELDS = _CAMPUS_CONTACT_FIELDS[1:]
+
 
 class BaseFormatter:
     """Base formatter with common utilities"""
 
-    def __init__(self):
-        self.text_processor = VietnameseTextProcessor()
+    # Leading emoji for list titles and empty-list messages
+    LIST_EMOJI: str = "📚"
+
+    # Shared by all instances; formatters are created per tool/request
+    text_processor: VietnameseTextProcessor = _TEXT_PROCESSOR
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _clean(text: str) -> str:
+        """Cached clean_query for descriptions/addresses repeated across lists"""
+        return _TEXT_PROCESSOR.clean_query(text)
 
     def _format_list_response(
         self,
         items: List[Dict[str, Any]],
         meta: Dict[str, Any],
         title: str,
-        format_item_func,
+        format_item_func: Callable[[Dict[str, Any]], str],
         empty_message: str,
     ) -> str:
         """Helper method to format list responses consistently"""
+        return "".join(
+            self._iter_list_response(
+                items, meta, title, format_item_func, empty_message
+            )
+        )
+
+    def _iter_list_response(
+        self,
+        items: List[Dict[str, Any]],
+        meta: Dict[str, Any],
+        title: str,
+        format_item_func: Callable[[Dict[str, Any]], str],
+        empty_message: str,
+    ) -> Iterator[str]:
+        """Yield a list response chunk by chunk for streaming consumers"""
         if not items:
-            return f"📚 {empty_message}"
+            yield f"{self.LIST_EMOJI} {empty_message}"
+            return
 
-        result = f"📚 **{title}**\n\n"
+        yield f"{self.LIST_EMOJI} **{title}**\n\n"
 
-        for item in items:
-            if isinstance(item, dict):
-                result += format_item_func(item)
+        # API payloads may hold non-dict entries; drop them once, then map the
+        # formatter without a per-item branch
+        records = [item for item in items if isinstance(item, dict)]
+        yield from map(format_item_func, records)
 
-        # Add pagination info
-        total = meta.get("total", len(items))
-        has_next = meta.get("has_next", False)
+        yield self._format_pagination(len(items), meta)
 
-        result += f"\n📊 **Thống kê**: Hiển thị {len(items)}/{total} kết quả"
-        if has_next:
-            result += f" (có thêm {total - len(items)} kết quả khác)"
+    def _optional_lines(
+        self, data: Dict[str, Any], fields: Tuple[Tuple[str, str, bool], ...]
+    ) -> List[str]:
+        """Render the (key, template, clean) lines whose value is present"""
+        return [
+            template.format(self._clean(value) if clean else value)
+            for key, template, clean in fields
+            if (value := data.get(key))
+        ]
 
-        return result
+    def _format_pagination(self, count: int, meta: Dict[str, Any]) -> str:
+        """Format the pagination footer of a list response"""
+        total = meta.get("total", count)
+        footer = f"\n📊 **Thống kê**: Hiển thị {count}/{total} kết quả"
+        if meta.get("has_next", False):
+            footer += f" (có thêm {total - count} kết quả khác)"
+        return footer
 
 
 class DepartmentFormatter(BaseFormatter):
@@ -54,16 +104,16 @@ class DepartmentFormatter(BaseFormatter):
         dept_id = dept.get("id", "N/A")
         description = dept.get("description", "")
 
-        result = f"🏛️ **{name}**\n"
+        parts = [f"🏛️ **{name}**\n"]
         if name_en:
-            result += f"   📝 English: {name_en}\n"
-        result += f"   🔖 Code: {code}\n"
-        result += f"   🆔 ID: {dept_id}\n"
+            parts.append(f"   📝 English: {name_en}\n")
+        parts.append(f"   🔖 Code: {code}\n")
+        parts.append(f"   🆔 ID: {dept_id}\n")
         if description:
-            clean_desc = self.text_processor.clean_query(description)
-            result += f"   📄 Mô tả: {clean_desc}\n"
-        result += "\n"
-        return result
+            clean_desc = self._clean(description)
+            parts.append(f"   📄 Mô tả: {clean_desc}\n")
+        parts.append("\n")
+        return "".join(parts)
 
     def format_departments_list(
         self, departments: List[Dict[str, Any]], meta: Dict[str, Any]
@@ -95,14 +145,14 @@ class ProgramFormatter(BaseFormatter):
         else:
             dept_name = "N/A"
 
-        result = f"🎯 **{name}**\n"
+        parts = [f"🎯 **{name}**\n"]
         if name_en:
-            result += f"   📝 English: {name_en}\n"
-        result += f"   🔖 Code: {code}\n"
-        result += f"   🆔 ID: {program_id}\n"
-        result += f"   ⏱️ Thời gian: {duration} năm\n"
-        result += f"   🏛️ Khoa: {dept_name}\n\n"
-        return result
+            parts.append(f"   📝 English: {name_en}\n")
+        parts.append(f"   🔖 Code: {code}\n")
+        parts.append(f"   🆔 ID: {program_id}\n")
+        parts.append(f"   ⏱️ Thời gian: {duration} năm\n")
+        parts.append(f"   🏛️ Khoa: {dept_name}\n\n")
+        return "".join(parts)
 
     def format_programs_list(
         self,
@@ -111,21 +161,25 @@ class ProgramFormatter(BaseFormatter):
         department_code: Optional[str] = None,
     ) -> str:
         """Format programs list"""
-        filter_text = f" (khoa: {department_code})" if department_code else ""
-        empty_msg = f"Không tìm thấy chương trình học nào{filter_text}."
+        # The department filter only shows up in the empty-result message
+        if not programs:
+            filter_text = f" (khoa: {department_code})" if department_code else ""
+            return (
+                f"{self.LIST_EMOJI} Không tìm thấy chương trình học nào{filter_text}."
+            )
 
         return self._format_list_response(
             programs,
             meta,
             "DANH SÁCH CHƯƠNG TRÌNH HỌC FPT UNIVERSITY",
             self.format_program,
-            empty_msg,
+            "Không tìm thấy chương trình học nào.",
         )
 
     def format_program_details(self, program: Dict[str, Any]) -> str:
         """Format program details"""
         if not isinstance(program, dict):
-            return "❌ Không tìm thấy thông tin chương trình học."
+            return _ERR_NO_PROGRAM
 
         name = program.get("name", "N/A")
         name_en = program.get("name_en", "")
@@ -143,44 +197,49 @@ class ProgramFormatter(BaseFormatter):
             dept_code = "N/A"
             dept_name_en = ""
 
-        result = "🎯 **CHI TIẾT CHƯƠNG TRÌNH HỌC**\n\n"
-        result += f"📚 **Tên chương trình**: {name}\n"
+        parts = ["🎯 **CHI TIẾT CHƯƠNG TRÌNH HỌC**\n\n"]
+        parts.append(f"📚 **Tên chương trình**: {name}\n")
         if name_en:
-            result += f"📝 **English**: {name_en}\n"
-        result += f"🔖 **Mã chương trình**: {code}\n"
-        result += f"🆔 **ID chương trình**: {program_id}\n"
-        result += f"⏱️ **Thời gian đào tạo**: {duration} năm\n\n"
+            parts.append(f"📝 **English**: {name_en}\n")
+        parts.append(f"🔖 **Mã chương trình**: {code}\n")
+        parts.append(f"🆔 **ID chương trình**: {program_id}\n")
+        parts.append(f"⏱️ **Thời gian đào tạo**: {duration} năm\n\n")
 
-        result += "🏛️ **THÔNG TIN KHOA**\n"
-        result += f"   📚 Tên khoa: {dept_name}\n"
+        parts.append("🏛️ **THÔNG TIN KHOA**\n")
+        parts.append(f"   📚 Tên khoa: {dept_name}\n")
         if dept_name_en:
-            result += f"   📝 English: {dept_name_en}\n"
-        result += f"   🔖 Mã khoa: {dept_code}\n"
+            parts.append(f"   📝 English: {dept_name_en}\n")
+        parts.append(f"   🔖 Mã khoa: {dept_code}\n")
 
-        return result
+        return "".join(parts)
 
 
 class CampusFormatter(BaseFormatter):
     """Formatter for campus data"""
 
+    @staticmethod
+    def _extract_prep(campus: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Return (orientation, english_prep) fee dicts, empty when malformed"""
+        prep_fees = campus.get("preparation_fees")
+        if not isinstance(prep_fees, dict):
+            return {}, {}
+
+        orientation = prep_fees.get("orientation")
+        english_prep = prep_fees.get("english_prep")
+        return (
+            orientation if isinstance(orientation, dict) else {},
+            english_prep if isinstance(english_prep, dict) else {},
+        )
+
     def format_campus(self, campus: Dict[str, Any]) -> str:
         """Format single campus"""
         name = campus.get("name", "N/A")
         code = campus.get("code", "N/A")
         campus_id = campus.get("id", "N/A")
         city = campus.get("city", "N/A")
-        address = campus.get("address", "")
-        phone = campus.get("phone", "")
-        email = campus.get("email", "")
         discount = campus.get("discount_percentage", 0)
 
-        prep_fees = campus.get("preparation_fees", {})
-        orientation = (
-            prep_fees.get("orientation", {}) if isinstance(prep_fees, dict) else {}
-        )
-        english_prep = (
-            prep_fees.get("english_prep", {}) if isinstance(prep_fees, dict) else {}
-        )
+        orientation, english_prep = self._extract_prep(campus)
 
         available_programs = campus.get("available_programs", {})
         program_count = (
@@ -189,36 +248,27 @@ class CampusFormatter(BaseFormatter):
             else 0
         )
 
-        result = f"🏛️ **{name}**\n"
-        result += f"   🔖 Code: {code}\n"
-        result += f"   🆔 ID: {campus_id}\n"
-        result += f"   📍 Thành phố: {city}\n"
-
-        if address:
-            clean_address = self.text_processor.clean_query(address)
-            result += f"   🏠 Địa chỉ: {clean_address}\n"
-        if phone:
-            result += f"   📞 Điện thoại: {phone}\n"
-        if email:
-            result += f"   📧 Email: {email}\n"
+        parts = [f"🏛️ **{name}**\n"]
+        parts.append(f"   🔖 Code: {code}\n")
+        parts.append(f"   🆔 ID: {campus_id}\n")
+        parts.append(f"   📍 Thành phố: {city}\n")
+        parts.extend(self._optional_lines(campus, _CAMPUS_CONTACT_FIELDS))
 
         if discount > 0:
-            result += f"   💰 Giảm giá: {discount}%\n"
+            parts.append(f"   💰 Giảm giá: {discount}%\n")
 
-        result += f"   🎓 Số chương trình: {program_count}\n"
+        parts.append(f"   🎓 Số chương trình: {program_count}\n")
 
         # Foundation fees with proper formatting
-        if isinstance(orientation, dict) and orientation.get("fee"):
-            fee = orientation.get("fee", 0)
-            if isinstance(fee, (int, float)):
-                result += f"   📚 Phí định hướng: {fee:,} VND\n"
-        if isinstance(english_prep, dict) and english_prep.get("fee"):
-            fee = english_prep.get("fee", 0)
-            if isinstance(fee, (int, float)):
-                result += f"   🇬🇧 Phí tiếng Anh: {fee:,} VND\n"
-
-        result += "\n"
-        return result
+        fee = orientation.get("fee")
+        if fee and isinstance(fee, (int, float)):
+            parts.append(f"   📚 Phí định hướng: {fee:,} VND\n")
+        fee = english_prep.get("fee")
+        if fee and isinstance(fee, (int, float)):
+            parts.append(f"   🇬🇧 Phí tiếng Anh: {fee:,} VND\n")
+
+        parts.append("\n")
+        return "".join(parts)
 
     def format_campuses_list(
         self, campuses: List[Dict[str, Any]], meta: Dict[str, Any], year: int = 2025
@@ -240,30 +290,24 @@ class CampusFormatter(BaseFormatter):
         city = campus.get("city", "N/A")
         address = campus.get("address", "")
 
-        result = "🏛️ **CHI TIẾT CAMPUS FPT UNIVERSITY**\n\n"
-        result += f"🏫 **Tên campus**: {name}\n"
-        result += f"🔖 **Mã campus**: {code}\n"
-        result += f"🆔 **ID campus**: {campus_id}\n"
-        result += f"📍 **Thành phố**: {city}\n"
+        parts = ["🏛️ **CHI TIẾT CAMPUS FPT UNIVERSITY**\n\n"]
+        parts.append(f"🏫 **Tên campus**: {name}\n")
+        parts.append(f"🔖 **Mã campus**: {code}\n")
+        parts.append(f"🆔 **ID campus**: {campus_id}\n")
+        parts.append(f"📍 **Thành phố**: {city}\n")
 
         if address:
-            clean_address = self.text_processor.clean_query(address)
-            result += f"🏠 **Địa chỉ**: {clean_address}\n"
+            clean_address = self._clean(address)
+            parts.append(f"🏠 **Địa chỉ**: {clean_address}\n")
 
-        return result
+        return "".join(parts)
 
     def format_contact_info(self, campus: Dict[str, Any]) -> str:
         """Format contact information"""
-        phone = campus.get("phone", "")
-        email = campus.get("email", "")
+        parts = ["\n📞 **THÔNG TIN LIÊN HỆ**\n"]
+        parts.extend(self._optional_lines(campus, _CONTACT_INFO_FIELDS))
 
-        result = "\n📞 **THÔNG TIN LIÊN HỆ**\n"
-        if phone:
-            result += f"   📞 Điện thoại: {phone}\n"
-        if email:
-            result += f"   📧 Email: {email}\n"
-
-        return result
+        return "".join(parts)
 
     def format_discount_info(self, campus: Dict[str, Any]) -> str:
         """Format discount information"""
@@ -283,16 +327,16 @@ class CampusFormatter(BaseFormatter):
             program_count = 0
             program_codes = []
 
-        result = "\n🎓 **CHƯƠNG TRÌNH HỌC**\n"
-        result += f"   📊 Tổng số chương trình: {program_count}\n"
+        parts = ["\n🎓 **CHƯƠNG TRÌNH HỌC**\n"]
+        parts.append(f"   📊 Tổng số chương trình: {program_count}\n")
 
         if program_codes and len(program_codes) > 0:
-            result += f"   📚 Mã chương trình: {', '.join(program_codes[:10])}"
+            parts.append(f"   📚 Mã chương trình: {', '.join(program_codes[:10])}")
             if len(program_codes) > 10:
-                result += f" (và {len(program_codes) - 10} chương trình khác)"
-            result += "\n"
+                parts.append(f" (và {len(program_codes) - 10} chương trình khác)")
+            parts.append("\n")
 
-        return result
+        return "".join(parts)
 
     def _format_foundation_fee(
         self, fee_info: Dict[str, Any], fee_type: str, emoji: str
@@ -309,41 +353,37 @@ class CampusFormatter(BaseFormatter):
         if not isinstance(fee, (int, float)):
             return ""
 
-        result = f"   {emoji} **{fee_type}**: {fee:,} VND\n"
-        result += f"      {'🔴 Bắt buộc' if is_mandatory else '🟡 Tùy chọn'}\n"
-        result += f"      ⏱️ Thời gian tối đa: {max_periods} kỳ\n"
+        parts = [f"   {emoji} **{fee_type}**: {fee:,} VND\n"]
+        parts.append(f"      {'🔴 Bắt buộc' if is_mandatory else '🟡 Tùy chọn'}\n")
+        parts.append(f"      ⏱️ Thời gian tối đa: {max_periods} kỳ\n")
 
         if description:
-            clean_desc = self.text_processor.clean_query(description)
-            result += f"      📝 {clean_desc}\n"
+            clean_desc = self._clean(description)
+            parts.append(f"      📝 {clean_desc}\n")
 
-        return result
+        return "".join(parts)
 
     def format_foundation_fees(self, campus: Dict[str, Any], year: int) -> str:
         """Format foundation fees information"""
-        prep_fees = campus.get("preparation_fees", {})
-        orientation = (
-            prep_fees.get("orientation", {}) if isinstance(prep_fees, dict) else {}
-        )
-        english_prep = (
-            prep_fees.get("english_prep", {}) if isinstance(prep_fees, dict) else {}
-        )
+        orientation, english_prep = self._extract_prep(campus)
 
-        result = f"\n💳 **PHÍ FOUNDATION ({year})**\n"
-        result += self._format_foundation_fee(orientation, "Phí định hướng", "📚")
-        result += self._format_foundation_fee(english_prep, "Phí tiếng Anh", "🇬🇧")
+        parts = [f"\n💳 **PHÍ FOUNDATION ({year})**\n"]
+        parts.append(self._format_foundation_fee(orientation, "Phí định hướng", "📚"))
+        parts.append(self._format_foundation_fee(english_prep, "Phí tiếng Anh", "🇬🇧"))
 
-        return result
+        return "".join(parts)
 
     def format_campus_details(self, campus: Dict[str, Any], year: int = 2025) -> str:
         """Format campus details"""
         if not isinstance(campus, dict):
-            return "❌ Không tìm thấy thông tin campus."
-
-        result = self.format_basic_campus_info(campus)
-        result += self.format_contact_info(campus)
-        result += self.format_discount_info(campus)
-        result += self.format_programs_info(campus)
-        result += self.format_foundation_fees(campus, year)
-
-        return result
+            return _ERR_NO_CAMPUS
+
+        return "".join(
+            (
+                self.format_basic_campus_info(campus),
+                self.format_contact_info(campus),
+                self.format_discount_info(campus),
+                self.format_programs_info(campus),
+                self.format_foundation_fees(campus, year),
+            )
+        )
@@ -7,10 +7,31 @@ NOT for public API usage.
 
 import asyncio
 import json
+import logging
+import os
+import re
 import sys
 import time
+from collections import Counter
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# uvloop không hỗ trợ Windows; dùng event loop mặc định ở đó
+UVLOOP_AVAILABLE = False
+if sys.platform != "win32":
+    try:
+        import uvloop
+
+        UVLOOP_AVAILABLE = True
+    except ImportError:
+        pass
 
 # Add src to Python path
 current_dir = Path(__file__).parent.parent
@@ -19,6 +40,101 @@ sys.path.insert(0, str(current_dir))
 from api.factories.service_factory import ServiceFactory  # noqa: E402
 
 
+# Giới hạn max_concurrent cho cả CLI lẫn từng batch ở chế độ --serve
+MIN_CONCURRENT = 1
+MAX_CONCURRENT = 20
+
+
+def save_results(results: Dict[str, Any], output_file: str) -> None:
+    """Write batch results as indented UTF-8 JSON"""
+    if ORJSON_AVAILABLE:
+        # orjson emits UTF-8 bytes directly, no str round-trip
+        with open(output_file, "wb") as f:
+            f.write(
+                orjson.dumps(
+                    results, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                )
+            )
+    else:
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+def dumps_line(obj: Any) -> bytes:
+    """Serialize one object as a compact UTF-8 JSON line"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS) + b"\n"
+    return (json.dumps(obj, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+def parse_serve_batch(
+    batch: Any, default_concurrent: int
+) -> Tuple[List[str], int, bool]:
+    """Validate one --serve batch, raising ValueError on bad input"""
+    if not isinstance(batch, dict):
+        raise ValueError("Batch must be a JSON object")
+
+    queries = batch.get("queries")
+    if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+        raise ValueError('"queries" must be a list of strings')
+    if not any(query.strip() for query in queries):
+        raise ValueError("No valid queries in batch")
+
+    max_concurrent = batch.get("max_concurrent", default_concurrent)
+    if (
+        isinstance(max_concurrent, bool)
+        or not isinstance(max_concurrent, int)
+        or not MIN_CONCURRENT <= max_concurrent <= MAX_CONCURRENT
+    ):
+        raise ValueError(
+            f'"max_concurrent" must be an integer between {MIN_CONCURRENT} '
+            f"and {MAX_CONCURRENT}"
+        )
+
+    include_metadata = batch.get("include_metadata", True)
+    if not isinstance(include_metadata, bool):
+        raise ValueError('"include_metadata" must be a boolean')
+
+    return queries, max_concurrent, include_metadata
+
+
+def reserve_stdout() -> BinaryIO:
+    """
+    Keep a private handle on the real stdout for JSONL responses
+
+    fd 1 is then pointed at stderr, so prints and any log handler that
+    already holds sys.stdout cannot write into the response stream.
+    """
+    sys.stdout.flush()
+    result_stream = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO)
+    return result_stream
+
+
+# Dòng rỗng/chỉ có khoảng trắng hoặc comment "#" (kể cả thụt lề), match trên bytes
+_SKIP_LINE = re.compile(rb"\s*(?:#|$)")
+
+
+def read_queries(file_path: str) -> List[str]:
+    """Read non-empty, non-comment queries from a file (one per line)"""
+    # Một lần read() bytes với buffer 64 KiB, chỉ decode các dòng khác rỗng
+    with open(file_path, "rb", buffering=1 << 16) as f:
+        raw = f.read()
+
+    skip = _SKIP_LINE.match
+    queries = []
+    for line in raw.splitlines():
+        # Lọc bằng một regex đã compile trên bytes, trước decode/strip
+        if skip(line):
+            continue
+        query = line.decode("utf-8").strip()
+        # Unicode whitespace (vd. NBSP) chỉ bị loại sau khi decode
+        if query and not query.startswith("#"):  # Skip empty lines and comments
+            queries.append(query)
+    return queries
+
+
 class BatchProcessor:
     """Internal batch processor for multiple queries"""
 
@@ -44,6 +160,7 @@ class BatchProcessor:
         queries: List[str],
         max_concurrent: int = 10,
         include_metadata: bool = True,
+        semaphore: Optional[asyncio.Semaphore] = None,
     ) -> Dict[str, Any]:
         """
         Process multiple queries and return structured results
@@ -52,6 +169,7 @@ class BatchProcessor:
             queries: List of query strings
             max_concurrent: Maximum concurrent operations
             include_metadata: Whether to include detailed metadata
+            semaphore: Optional per-query limiter shared across batches
 
         Returns:
             Dictionary with results and performance metrics
@@ -59,37 +177,52 @@ class BatchProcessor:
         if not self.intent_service:
             raise RuntimeError("Batch processor not initialized")
 
+        # detect_batch_queries bỏ qua query rỗng; lọc trước để zip(queries, results)
+        # ghép đúng query với kết quả của nó
+        queries = [query for query in queries if query and query.strip()]
+
         start_time = time.time()
 
         # Process queries
         results = await self.intent_service.detect_batch_queries(
-            queries=queries, max_concurrent=max_concurrent
+            queries=queries, max_concurrent=max_concurrent, semaphore=semaphore
         )
 
         processing_time = (time.time() - start_time) * 1000
 
-        # Format results
-        formatted_results = []
-        high_confidence_count = 0
-
-        for i, (query, result) in enumerate(zip(queries, results)):
-            formatted_result = {
-                "index": i,
-                "query": query,
-                "intent_id": result.id,
-                "confidence": result.confidence,
-                "method": result.method.value,
-                "timestamp": result.timestamp.isoformat(),
-            }
-
-            if include_metadata:
-                formatted_result["metadata"] = result.metadata
-                formatted_result["confidence_level"] = result.confidence_level.value
-
-            if result.confidence >= 0.7:
-                high_confidence_count += 1
-
-            formatted_results.append(formatted_result)
+        # Format results (tách nhánh include_metadata ra ngoài comprehension).
+        # intent_id lặp lại nhiều nên intern để mọi record dùng chung một chuỗi;
+        # .value của enum vốn đã là một object dùng chung
+        intern = sys.intern
+        if include_metadata:
+            formatted_results = [
+                {
+                    "index": i,
+                    "query": query,
+                    "intent_id": intern(result.id),
+                    "confidence": result.confidence,
+                    "method": result.method.value,
+                    "timestamp": result.timestamp.isoformat(),
+                    "metadata": result.metadata,
+                    "confidence_level": result.confidence_level.value,
+                }
+                for i, (query, result) in enumerate(zip(queries, results))
+            ]
+        else:
+            formatted_results = [
+                {
+                    "index": i,
+                    "query": query,
+                    "intent_id": intern(result.id),
+                    "confidence": result.confidence,
+                    "method": result.method.value,
+                    "timestamp": result.timestamp.isoformat(),
+                }
+                for i, (query, result) in enumerate(zip(queries, results))
+            ]
+
+        high_confidence_count = sum(1 for r in results if r.confidence >= 0.7)
+        intent_counter = Counter(r.id for r in results)
 
         # Calculate metrics
         total_queries = len(queries)
@@ -109,6 +242,7 @@ class BatchProcessor:
                 "processing_time_ms": processing_time,
                 "avg_processing_time_ms": avg_processing_time,
                 "max_concurrent": max_concurrent,
+                "intent_distribution": dict(intent_counter),
             },
         }
 
@@ -117,6 +251,7 @@ class BatchProcessor:
         file_path: str,
         max_concurrent: int = 10,
         output_file: Optional[str] = None,
+        semaphore: Optional[asyncio.Semaphore] = None,
     ) -> Dict[str, Any]:
         """
         Process queries from a file
@@ -125,17 +260,13 @@ class BatchProcessor:
             file_path: Path to file containing queries (one per line)
             max_concurrent: Maximum concurrent operations
             output_file: Optional output file for results
+            semaphore: Optional per-query limiter shared across batches
 
         Returns:
             Processing results
         """
-        # Read queries from file
-        queries = []
-        with open(file_path, "r", encoding="utf-8") as f:
-            for line in f:
-                query = line.strip()
-                if query and not query.startswith("#"):  # Skip empty lines and comments
-                    queries.append(query)
+        # Read queries from file (off the event loop)
+        queries = await asyncio.to_thread(read_queries, file_path)
 
         if not queries:
             raise ValueError(f"No valid queries found in {file_path}")
@@ -144,41 +275,88 @@ class BatchProcessor:
 
         # Process queries
         results = await self.process_queries(
-            queries=queries, max_concurrent=max_concurrent, include_metadata=True
+            queries=queries,
+            max_concurrent=max_concurrent,
+            include_metadata=True,
+            semaphore=semaphore,
         )
 
         # Save to output file if specified
         if output_file:
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(results, f, indent=2, ensure_ascii=False)
+            await asyncio.to_thread(save_results, results, output_file)
             print(f"💾 Results saved to {output_file}")
 
         return results
 
+    async def serve(self, output: BinaryIO, max_concurrent: int = 10) -> None:
+        """
+        Process JSONL batches from stdin until EOF, keeping services warm
+
+        Each input line is {"queries": [...]} with optional "id",
+        "max_concurrent" and "include_metadata"; each line produces one
+        JSON line on output (results or {"error": ..., "line": ...}).
+        """
+        stdin = sys.stdin.buffer
+        line_number = 0
+        while line := await asyncio.to_thread(stdin.readline):
+            line_number += 1
+            if not line.strip():
+                continue
+
+            batch_id = None
+            try:
+                batch = orjson.loads(line) if ORJSON_AVAILABLE else json.loads(line)
+                if isinstance(batch, dict):
+                    batch_id = batch.get("id")
+                queries, concurrent, include_metadata = parse_serve_batch(
+                    batch, max_concurrent
+                )
+                response = await self.process_queries(
+                    queries=queries,
+                    max_concurrent=concurrent,
+                    include_metadata=include_metadata,
+                )
+                if batch_id is not None:
+                    response["id"] = batch_id
+                payload = dumps_line(response)
+            except Exception as e:
+                # Lỗi của một dòng chỉ sinh một record lỗi, không dừng vòng lặp
+                error: Dict[str, Any] = {"error": str(e), "line": line_number}
+                if batch_id is not None:
+                    error["id"] = batch_id
+                payload = dumps_line(error)
+
+            output.write(payload)
+            output.flush()
+
     def print_summary(self, results: Dict[str, Any]) -> None:
         """Print a summary of batch processing results"""
         metrics = results["metrics"]
 
-        print("\n📊 Batch Processing Summary:")
-        print(f"   Total queries: {metrics['total_queries']}")
-        print(f"   High confidence (≥0.7): {metrics['high_confidence_count']}")
-        print(f"   Success rate: {metrics['success_rate']:.1f}%")
-        print(f"   Processing time: {metrics['processing_time_ms']:.1f}ms")
-        print(f"   Average per query: {metrics['avg_processing_time_ms']:.1f}ms")
-        print(f"   Max concurrent: {metrics['max_concurrent']}")
-
-        # Intent distribution
-        intent_counts: Dict[str, int] = {}
-        for result in results["results"]:
-            intent_id = result["intent_id"]
-            intent_counts[intent_id] = intent_counts.get(intent_id, 0) + 1
-
-        print("\n🎯 Intent Distribution:")
+        # Gom toàn bộ output rồi ghi stdout một lần
+        lines = [
+            "\n📊 Batch Processing Summary:",
+            f"   Total queries: {metrics['total_queries']}",
+            f"   High confidence (≥0.7): {metrics['high_confidence_count']}",
+            f"   Success rate: {metrics['success_rate']:.1f}%",
+            f"   Processing time: {metrics['processing_time_ms']:.1f}ms",
+            f"   Average per query: {metrics['avg_processing_time_ms']:.1f}ms",
+            f"   Max concurrent: {metrics['max_concurrent']}",
+        ]
+
+        # Intent distribution (counted once in process_queries)
+        intent_counts = metrics["intent_distribution"]
+
+        lines.append("\n🎯 Intent Distribution:")
+        total_queries = metrics["total_queries"]
         for intent_id, count in sorted(
             intent_counts.items(), key=lambda x: x[1], reverse=True
         ):
-            percentage = (count / metrics["total_queries"]) * 100
-            print(f"   {intent_id}: {count} ({percentage:.1f}%)")
+            percentage = (count / total_queries) * 100
+            lines.append(f"   {intent_id}: {count} ({percentage:.1f}%)")
+
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
 
 
 async def main():
@@ -200,14 +378,25 @@ async def main():
     )
     parser.add_argument("--model", "-m", default="gpt-4o", help="Model ID to use")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Stay running and process JSONL batches from stdin",
+    )
 
     args = parser.parse_args()
 
-    if not args.file and not args.queries:
-        parser.error("Either --file or --queries must be specified")
+    if not args.serve and not args.file and not args.queries:
+        parser.error("Either --file, --queries or --serve must be specified")
+
+    if not MIN_CONCURRENT <= args.concurrent <= MAX_CONCURRENT:
+        parser.error(
+            f"Concurrent operations must be between {MIN_CONCURRENT} "
+            f"and {MAX_CONCURRENT}"
+        )
 
-    if args.concurrent < 1 or args.concurrent > 20:
-        parser.error("Concurrent operations must be between 1 and 20")
+    # stdout chỉ dành cho kết quả JSONL; diagnostics chuyển sang stderr
+    result_stream = reserve_stdout() if args.serve else None
 
     # Initialize processor
     processor = BatchProcessor()
@@ -221,6 +410,11 @@ async def main():
     print("✅ Batch processor initialized")
 
     try:
+        if result_stream is not None:
+            # Reuse the warm processor for every batch until stdin closes
+            await processor.serve(result_stream, max_concurrent=args.concurrent)
+            return 0
+
         if args.file:
             # Process from file
             results = await processor.process_from_file(
@@ -238,8 +432,7 @@ async def main():
 
             # Save to output file if specified
             if args.output:
-                with open(args.output, "w", encoding="utf-8") as f:
-                    json.dump(results, f, indent=2, ensure_ascii=False)
+                await asyncio.to_thread(save_results, results, args.output)
                 print(f"💾 Results saved to {args.output}")
 
         # Print summary
@@ -253,4 +446,6 @@ async def main():
 
 
 if __name__ == "__main__":
+    if UVLOOP_AVAILABLE:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     sys.exit(asyncio.run(main()))
@@ -4,28 +4,158 @@ Script to ingest intent examples from a JSON file into the vector store.
 """
 
 import asyncio
+import hashlib
 import json
 import os
+import sqlite3
 import sys
+from array import array
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# uvloop không hỗ trợ Windows; dùng event loop mặc định ở đó
+UVLOOP_AVAILABLE = False
+if sys.platform != "win32":
+    try:
+        import uvloop
+
+        UVLOOP_AVAILABLE = True
+    except ImportError:
+        pass
 
 # Add project root to Python path
 current_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(current_dir))
 
-from infrastructure.embeddings import get_embedding_service
+from infrastructure.embeddings import get_embedding_service, get_embeddings_batch
 from infrastructure.vector_stores.qdrant_store import QdrantVectorStore
 from shared.utils.text_processing import VietnameseTextProcessor
 
 
+INGEST_CHUNK_SIZE = 64
+INGEST_MAX_CONCURRENT = 8
+INGEST_QUEUE_SIZE = 8
+
+# One processor per worker process, created on first use
+_worker_processor: Optional[VietnameseTextProcessor] = None
+
+
+def _normalize_batch(texts: List[str]) -> List[str]:
+    """Normalize a chunk of texts inside a worker process."""
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = VietnameseTextProcessor()
+    return [_worker_processor.normalize_vietnamese(text) for text in texts]
+
+
+class EmbeddingCache:
+    """SQLite-backed embedding cache keyed by a hash of model id and text."""
+
+    # Giữ số tham số mỗi câu SELECT dưới giới hạn biến của SQLite
+    LOOKUP_CHUNK_SIZE = 500
+
+    def __init__(self, path: Path, model_id: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.model_id = model_id
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+
+    def _key(self, text: str) -> str:
+        data = f"{self.model_id}\x00{text}".encode("utf-8")
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Return cached vectors in order, None for misses."""
+        keys = [self._key(text) for text in texts]
+        found: Dict[str, bytes] = {}
+        for i in range(0, len(keys), self.LOOKUP_CHUNK_SIZE):
+            chunk = keys[i : i + self.LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            found.update(
+                self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk,
+                )
+            )
+        return [
+            array("d", found[key]).tolist() if key in found else None for key in keys
+        ]
+
+    def set_many(self, items: Iterable[Tuple[str, List[float]]]) -> None:
+        """Store (text, vector) pairs."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                (
+                    (self._key(text), array("d", vector).tobytes())
+                    for text, vector in items
+                ),
+            )
+
+    def close(self) -> None:
+        self.conn.close()
+
+
 class IntentIngestor:
     """Ingests intent examples into a vector store."""
 
-    def __init__(self, vector_store: QdrantVectorStore, embedding_service: Any):
+    def __init__(
+        self,
+        vector_store: QdrantVectorStore,
+        embedding_service: Any,
+        executor: Optional[Executor] = None,
+        cache: Optional[EmbeddingCache] = None,
+    ):
         self.vector_store = vector_store
         self.embedding_service = embedding_service
         self.text_processor = VietnameseTextProcessor()
+        # Optional process pool for CPU-bound normalization
+        self.executor = executor
+        # Optional on-disk cache so re-runs only embed new examples
+        self.cache = cache
+
+    async def _normalize_chunk(self, texts: List[str]) -> List[str]:
+        """Normalize one chunk, in the process pool if one is set."""
+        if self.executor is None:
+            return [self.text_processor.normalize_vietnamese(text) for text in texts]
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, _normalize_batch, texts)
+
+    async def _process_chunk(
+        self,
+        texts: List[str],
+        cached: List[Optional[List[float]]],
+        semaphore: asyncio.Semaphore,
+    ) -> Tuple[List[str], List[List[float]]]:
+        """Normalize one chunk and embed its cache misses concurrently."""
+        misses = [text for text, vector in zip(texts, cached) if vector is None]
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            normalized, fresh = await asyncio.gather(
+                self._normalize_chunk(texts),
+                loop.run_in_executor(
+                    None, get_embeddings_batch, misses, self.embedding_service
+                ),
+            )
+
+        fresh_vectors = iter(fresh)
+        vectors = [
+            vector if vector is not None else next(fresh_vectors) for vector in cached
+        ]
+        return normalized, vectors
 
     async def ingest_from_file(self, file_path: Path):
         """
@@ -39,8 +169,9 @@ class IntentIngestor:
             return
 
         print(f"📄 Reading intent examples from '{file_path}'...")
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(file_path, "rb") as f:
+            raw = f.read()
+        data = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
 
         intents = data.get("intents", [])
         if not intents:
@@ -48,45 +179,124 @@ class IntentIngestor:
             return
 
         print(f"Found {len(intents)} intents. Processing examples...")
-        
-        all_texts = []
-        all_vectors = []
-        all_metadata = []
+
+        # Flatten every example first so embeddings go out in batched requests
+        all_texts: List[str] = []
+        intent_ids: List[str] = []
 
         for intent in intents:
             intent_id = intent.get("id")
             examples = intent.get("examples", [])
-            
+
             if not intent_id or not examples:
                 continue
 
             print(f"  - Processing intent: '{intent_id}' with {len(examples)} examples.")
-            
-            # Generate embeddings for all examples of an intent
-            embeddings = [self.embedding_service.get_embedding(ex) for ex in examples]
-
-            for i, example in enumerate(examples):
-                # Simple text normalization
-                normalized_text = self.text_processor.normalize_vietnamese(example)
-                
-                all_texts.append(example)
-                all_vectors.append(embeddings[i])
-                all_metadata.append({
-                    "intent_id": intent_id,
-                    "normalized_text": normalized_text,
-                    "source": "intent-examples.json",
-                })
-
-        if all_texts:
-            print(f"\n✨ Ingesting {len(all_texts)} points into the vector store...")
-            await self.vector_store.add_documents(
-                texts=all_texts, 
-                vectors=all_vectors, 
-                metadata=all_metadata
+            all_texts.extend(examples)
+            intent_ids.extend([intent_id] * len(examples))
+
+        if not all_texts:
+            print("No points to ingest.")
+            return
+
+        # Exact dedup (case/whitespace-insensitive): embed each distinct example
+        # once; members[slot] lists the original examples sharing that vector
+        seen: Dict[str, int] = {}
+        unique_texts: List[str] = []
+        members: List[List[int]] = []
+        for index, example in enumerate(all_texts):
+            key = " ".join(example.lower().split())
+            slot = seen.get(key)
+            if slot is None:
+                slot = seen[key] = len(unique_texts)
+                unique_texts.append(example)
+                members.append([])
+            members[slot].append(index)
+
+        if len(unique_texts) < len(all_texts):
+            print(
+                f"  - Skipping {len(all_texts) - len(unique_texts)} duplicate "
+                "examples for embedding."
             )
-            print("✅ Ingestion complete!")
+
+        if self.cache is not None:
+            cached = self.cache.get_many(unique_texts)
+            hits = sum(vector is not None for vector in cached)
+            print(f"  - Embedding cache: {hits}/{len(unique_texts)} hits.")
         else:
-            print("No points to ingest.")
+            cached = [None] * len(unique_texts)
+
+        def build_batch(
+            start: int, normalized: List[str], vectors: List[List[float]]
+        ) -> Tuple[List[str], List[List[float]], List[Dict[str, Any]]]:
+            """Expand one processed chunk back into points for every member."""
+            if self.cache is not None:
+                self.cache.set_many(
+                    (unique_texts[start + offset], vector)
+                    for offset, vector in enumerate(vectors)
+                    if cached[start + offset] is None
+                )
+
+            texts: List[str] = []
+            batch_vectors: List[List[float]] = []
+            metadata: List[Dict[str, Any]] = []
+            for offset, (normalized_text, vector) in enumerate(
+                zip(normalized, vectors)
+            ):
+                for index in members[start + offset]:
+                    texts.append(all_texts[index])
+                    batch_vectors.append(vector)
+                    metadata.append(
+                        {
+                            "intent_id": intent_ids[index],
+                            "normalized_text": normalized_text,
+                            "source": "intent-examples.json",
+                        }
+                    )
+            return texts, batch_vectors, metadata
+
+        # Producer/consumer: chunks are normalized + embedded (at most
+        # INGEST_MAX_CONCURRENT in flight) and handed to the uploader through a
+        # bounded queue, so memory stays proportional to the window, not the file
+        queue: asyncio.Queue = asyncio.Queue(maxsize=INGEST_QUEUE_SIZE)
+
+        async def produce() -> None:
+            semaphore = asyncio.Semaphore(INGEST_MAX_CONCURRENT)
+            pending: Deque[Tuple[int, asyncio.Task]] = deque()
+
+            async def flush_oldest() -> None:
+                start, task = pending.popleft()
+                normalized, vectors = await task
+                await queue.put(build_batch(start, normalized, vectors))
+
+            try:
+                for start in range(0, len(unique_texts), INGEST_CHUNK_SIZE):
+                    end = start + INGEST_CHUNK_SIZE
+                    task = asyncio.create_task(
+                        self._process_chunk(
+                            unique_texts[start:end], cached[start:end], semaphore
+                        )
+                    )
+                    pending.append((start, task))
+                    if len(pending) >= INGEST_MAX_CONCURRENT:
+                        await flush_oldest()
+                while pending:
+                    await flush_oldest()
+            finally:
+                for _, task in pending:
+                    task.cancel()
+                await queue.put(None)
+
+        async def consume() -> None:
+            while (batch := await queue.get()) is not None:
+                texts, vectors, metadata = batch
+                await self.vector_store.add_documents(
+                    texts=texts, vectors=vectors, metadata=metadata
+                )
+
+        print(f"\n✨ Ingesting {len(all_texts)} points into the vector store...")
+        await asyncio.gather(produce(), consume())
+        print("✅ Ingestion complete!")
 
 
 async def main():
@@ -98,14 +308,24 @@ async def main():
     print(f"Connecting to Qdrant at: {qdrant_url}")
 
     # Initialize services
-    vector_store = QdrantVectorStore(url=qdrant_url, api_key=qdrant_api_key)
     embedding_service = get_embedding_service()
+    vector_store = QdrantVectorStore(
+        url=qdrant_url, api_key=qdrant_api_key, embedding_service=embedding_service
+    )
 
     # Create and run the ingestor
-    ingestor = IntentIngestor(vector_store, embedding_service)
     file_path = current_dir.parent / "data" / "intent-examples.json"
-    
-    await ingestor.ingest_from_file(file_path)
+
+    cache = EmbeddingCache(
+        current_dir.parent / ".cache" / "embeddings.sqlite3", embedding_service.id
+    )
+
+    try:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            ingestor = IntentIngestor(vector_store, embedding_service, executor, cache)
+            await ingestor.ingest_from_file(file_path)
+    finally:
+        cache.close()
 
     print("🏁 Ingestion process finished.")
 
@@ -113,5 +333,7 @@ async def main():
 if __name__ == "__main__":
     from dotenv import load_dotenv
     load_dotenv()
-    
+
+    if UVLOOP_AVAILABLE:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(main()) 
\ No newline at end of file